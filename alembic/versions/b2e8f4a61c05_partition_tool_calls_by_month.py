@@ -0,0 +1,106 @@
+"""partition tool_calls by month
+
+Revision ID: b2e8f4a61c05
+Revises: 9c4d1e6f2a87
+Create Date: 2026-10-17 15:22:48.170342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2e8f4a61c05'
+down_revision: Union[str, Sequence[str], None] = '9c4d1e6f2a87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created ahead of now; afterwards `python -m app.services.partitions` keeps this up to date
+PARTITIONS_AHEAD = 3
+
+INDEXES = (
+    ('ix_tool_calls_call_id', ['call_id']),
+    ('ix_tool_calls_tool_name', ['tool_name']),
+    ('ix_tool_calls_organization_id', ['organization_id']),
+)
+
+# One partition per month from the oldest existing row up to PARTITIONS_AHEAD months from now
+CREATE_MONTHLY_PARTITIONS = f"""
+DO $$
+DECLARE
+    part_start date := date_trunc('month', coalesce((SELECT min(created_at) FROM tool_calls_legacy), now()) AT TIME ZONE 'UTC');
+    last_start date := date_trunc('month', now() AT TIME ZONE 'UTC') + interval '{PARTITIONS_AHEAD} months';
+BEGIN
+    WHILE part_start <= last_start LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF tool_calls FOR VALUES FROM (%L) TO (%L)',
+            'tool_calls_' || to_char(part_start, 'YYYYMM'),
+            part_start::timestamp AT TIME ZONE 'UTC',
+            (part_start + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+        part_start := part_start + interval '1 month';
+    END LOOP;
+END $$;
+"""
+
+COLUMNS = "id, organization_id, call_id, tool_name, request_json, response_json, success, error, created_at"
+
+
+def _tool_calls_columns() -> list:
+    return [
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('organization_id', sa.UUID(), nullable=True),
+        sa.Column('call_id', sa.UUID(), nullable=True),
+        sa.Column('tool_name', sa.String(length=120), nullable=False),
+        sa.Column('request_json', sa.JSON(), nullable=True),
+        sa.Column('response_json', sa.JSON(), nullable=True),
+        sa.Column('success', sa.Boolean(), server_default='true', nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['call_id'], ['calls.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ondelete='CASCADE'),
+    ]
+
+
+def _rename_to_legacy() -> None:
+    op.rename_table('tool_calls', 'tool_calls_legacy')
+    op.execute('ALTER TABLE tool_calls_legacy RENAME CONSTRAINT tool_calls_pkey TO tool_calls_legacy_pkey')
+    for name, _ in INDEXES:
+        op.execute(f'ALTER INDEX IF EXISTS {name} RENAME TO {name.replace("tool_calls", "tool_calls_legacy")}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Partitioned tables need the partition key in the primary key, hence (id, created_at).
+    # Rows are copied over once; later retention is handled by detaching/dropping partitions.
+    _rename_to_legacy()
+    op.create_table('tool_calls',
+    *_tool_calls_columns(),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    for name, columns in INDEXES:
+        op.create_index(name, 'tool_calls', columns, unique=False)
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+    # Safety net for rows outside the pre-created months; the maintenance command reports it when non-empty
+    op.execute('CREATE TABLE tool_calls_default PARTITION OF tool_calls DEFAULT')
+    op.execute(f'INSERT INTO tool_calls ({COLUMNS}) SELECT {COLUMNS} FROM tool_calls_legacy')
+    op.drop_table('tool_calls_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('tool_calls', 'tool_calls_partitioned')
+    for name, _ in INDEXES:
+        op.execute(f'ALTER INDEX IF EXISTS {name} RENAME TO {name.replace("tool_calls", "tool_calls_partitioned")}')
+    op.execute('ALTER TABLE tool_calls_partitioned RENAME CONSTRAINT tool_calls_pkey TO tool_calls_partitioned_pkey')
+    op.create_table('tool_calls',
+    *_tool_calls_columns(),
+    sa.PrimaryKeyConstraint('id')
+    )
+    for name, columns in INDEXES:
+        op.create_index(name, 'tool_calls', columns, unique=False)
+    op.execute(f'INSERT INTO tool_calls ({COLUMNS}) SELECT {COLUMNS} FROM tool_calls_partitioned')
+    op.drop_table('tool_calls_partitioned')
@@ -1,6 +1,6 @@
 from functools import lru_cache
-from typing import Union
-from pydantic import Field, field_validator
+from typing import Literal, Union
+from pydantic import Field, field_validator, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -19,6 +19,10 @@ class Settings(BaseSettings):
     )
 
     DATABASE_URL: str = Field(..., min_length=20)
+    # Optional: async driver URL; defaults to DATABASE_URL with the psycopg (v3) async driver
+    ASYNC_DATABASE_URL: str | None = None
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
     SERVER_BASE_URL: str = Field(...)
     VAPI_API_TOKEN: str = Field(..., min_length=20)
     LOG_LEVEL: str = "INFO"
@@ -29,11 +33,99 @@ class Settings(BaseSettings):
     CAL_COM_API_KEY: str | None = Field(default=None, min_length=20)
     CAL_COM_EVENT_TYPE_ID: int | None = None
     ASSISTANT_ID: str | None = None
+    # Shared Cal.com HTTP client (keep-alive pool; HTTP/2 only if the optional h2 package is installed)
+    CAL_COM_MAX_CONNECTIONS: int = 100
+    CAL_COM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    CAL_COM_KEEPALIVE_EXPIRY_SEC: float = 30.0
+    CAL_COM_CONNECT_TIMEOUT_SEC: float = 5.0
+    CAL_COM_TIMEOUT_SEC: float = 30.0
+    CAL_COM_HTTP2: bool = False
+    # Concurrent identical Cal.com GETs (slots, bookings) share one upstream request
+    CAL_COM_COALESCE_GETS: bool = True
+    # Cal.com tail latency: deadlines per operation (retries/hedges included), jittered retries for GETs,
+    # hedged /slots request after N seconds (0 = off), per-credential circuit breaker (0 failures = off)
+    CAL_COM_SLOTS_DEADLINE_SEC: float = 4.0
+    CAL_COM_BOOKINGS_DEADLINE_SEC: float = 5.0
+    CAL_COM_CREATE_DEADLINE_SEC: float = 10.0
+    CAL_COM_GET_RETRIES: int = 2
+    CAL_COM_RETRY_BACKOFF_SEC: float = 0.2
+    CAL_COM_SLOTS_HEDGE_AFTER_SEC: float = 0.0
+    CAL_COM_BREAKER_FAILURES: int = 5
+    CAL_COM_BREAKER_RESET_SEC: float = 30.0
+    CAL_COM_BREAKER_MAX_SIZE: int = 1024
+    CAL_COM_BREAKER_IDLE_SEC: float = 3600.0
+    # Cal.com availability: fresh for TTL, then served stale (refreshed in the background) for up to STALE more seconds
+    AVAILABILITY_CACHE_ENABLED: bool = True
+    AVAILABILITY_CACHE_TTL_SEC: float = 30.0
+    AVAILABILITY_CACHE_STALE_SEC: float = 300.0
+    AVAILABILITY_CACHE_MAX_SIZE: int = 2000
+    # Background warm-up of the default availability window: "off", "all" agents with an event type,
+    # or "recent" (agents with a call in the last AVAILABILITY_WARMER_RECENT_HOURS). The interval must stay
+    # below AVAILABILITY_CACHE_TTL_SEC; 0 uses half of it
+    AVAILABILITY_WARMER_MODE: Literal["off", "all", "recent"] = "off"
+    AVAILABILITY_WARMER_INTERVAL_SEC: float = 0.0
+    AVAILABILITY_WARMER_CONCURRENCY: int = 4
+    AVAILABILITY_WARMER_JITTER_SEC: float = 15.0
+    AVAILABILITY_WARMER_RECENT_HOURS: float = 24.0
     # JWT auth (set JWT_SECRET in production)
     JWT_SECRET: str = Field(default="change-me-in-production-min-32-chars", min_length=32)
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
 
+    # In-process cache of X-API-KEY -> agent (tool and booking requests)
+    AGENT_CACHE_TTL_SEC: float = 60.0
+    AGENT_CACHE_MAX_SIZE: int = 1024
+
+    # In-process cache of VAPI assistantId -> agent for webhooks; unknown assistants are cached briefly
+    ASSISTANT_CACHE_TTL_SEC: float = 60.0
+    ASSISTANT_CACHE_NEGATIVE_TTL_SEC: float = 10.0
+    ASSISTANT_CACHE_MAX_SIZE: int = 1024
+
+    # Write-behind buffer for ToolCall audit rows
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SEC: float = 1.0
+
+    # Write-behind buffer for CallEvent rows (VAPI webhook events)
+    CALL_EVENT_QUEUE_MAX_SIZE: int = 50000
+    CALL_EVENT_BATCH_SIZE: int = 1000
+    CALL_EVENT_FLUSH_INTERVAL_SEC: float = 1.0
+    # Fraction of events stored per event type, e.g. CALL_EVENT_SAMPLE_RATES='{"transcript.partial": 0.1}'
+    CALL_EVENT_SAMPLE_RATES: dict[str, float] = {}
+    CALL_EVENT_PAYLOAD_MAX_BYTES: int = 2048
+    # Store the full webhook payload (trimmed) instead of only the fields the handler reads
+    CALL_EVENT_STORE_FULL_PAYLOAD: bool = False
+
+    # tool_calls is partitioned by month; `python -m app.services.partitions` applies these. Old months are
+    # only dropped once a retention is set (0 = keep forever)
+    TOOL_CALLS_PARTITIONS_AHEAD: int = 3
+    TOOL_CALLS_RETENTION_MONTHS: int = 0
+
+    # Per-call context (call id, linked lead) reused across a conversation's tool calls
+    CALL_CONTEXT_IDLE_SEC: float = 900.0
+    CALL_CONTEXT_MAX_SIZE: int = 10000
+
+    # Stored tool responses replayed to retried VAPI requests
+    TOOL_REPLAY_TTL_SEC: float = 600.0
+    TOOL_REPLAY_MAX_SIZE: int = 10000
+
+    # VAPI webhooks: "sync" processes before responding, "queue" acknowledges and processes in background workers
+    WEBHOOK_INGEST_MODE: Literal["sync", "queue"] = "sync"
+    WEBHOOK_INGEST_WORKERS: int = 4
+    WEBHOOK_INGEST_QUEUE_MAX_SIZE: int = 10000
+    WEBHOOK_INGEST_BATCH_SIZE: int = 100
+    # Per-call dedup/sequencing of webhook events (duplicates and late call.started/call.ended are dropped)
+    WEBHOOK_DEDUP_ENABLED: bool = True
+    WEBHOOK_DEDUP_IDLE_SEC: float = 1800.0
+    WEBHOOK_DEDUP_MAX_CALLS: int = 10000
+    # Bulk endpoint: events applied per chunk (calls in a chunk run WEBHOOK_INGEST_WORKERS at a time)
+    WEBHOOK_BULK_CHUNK_SIZE: int = 1000
+
+    # Partial transcripts: "persist" stores every partial, "buffer" keeps only the latest one in memory
+    TRANSCRIPT_PARTIALS_MODE: Literal["persist", "buffer"] = "persist"
+    LIVE_PARTIAL_TTL_SEC: float = 120.0
+    LIVE_PARTIAL_MAX_SIZE: int = 10000
+
     # CORS (env can be comma-separated string, e.g. CORS_ORIGINS="http://a.com,http://b.com")
     CORS_ORIGINS: list[str] = Field(
         default=[
@@ -53,6 +145,14 @@ class Settings(BaseSettings):
     def parse_cors_origins(cls, v: Union[list[str], str]) -> list[str]:
         return _parse_cors_origins(v)
 
+    @model_validator(mode="after")
+    def check_warmer_interval(self) -> "Settings":
+        if self.AVAILABILITY_WARMER_INTERVAL_SEC <= 0:
+            self.AVAILABILITY_WARMER_INTERVAL_SEC = self.AVAILABILITY_CACHE_TTL_SEC / 2
+        elif self.AVAILABILITY_WARMER_INTERVAL_SEC >= self.AVAILABILITY_CACHE_TTL_SEC:
+            raise ValueError("AVAILABILITY_WARMER_INTERVAL_SEC must be below AVAILABILITY_CACHE_TTL_SEC")
+        return self
+
 
 @lru_cache
 def get_settings() -> Settings:
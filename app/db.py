@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.config import get_settings
 from app.models.base import Base
@@ -8,9 +10,34 @@ engine = create_engine(get_settings().DATABASE_URL, pool_pre_ping=True)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url() -> str:
+    """ASYNC_DATABASE_URL if set, else DATABASE_URL switched to the async psycopg driver."""
+    settings = get_settings()
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+
+
+# async engine for the live-call paths (tools, webhooks) so they run on the event loop
+async_engine = create_async_engine(
+    _async_database_url(),
+    pool_pre_ping=True,
+    pool_size=get_settings().DB_POOL_SIZE,
+    max_overflow=get_settings().DB_MAX_OVERFLOW,
+)
+
+# expire_on_commit=False: handlers read attributes after commit, which must not lazy-load
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
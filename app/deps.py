@@ -1,18 +1,57 @@
+from dataclasses import dataclass
+from datetime import datetime
 from uuid import UUID
 
 from fastapi import Depends, Header, Path
 from fastapi.exceptions import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import get_settings, Settings
-from app.db import get_db
+from app.db import get_async_db, get_db
 from app.models import Agent, Organization, OrganizationMember, User
 from app.utils.auth import decode_access_token
+from app.utils.cache import TTLCache
+from app.utils.timing import phase
 
 security = HTTPBearer(auto_error=False)
 
 
+@dataclass(frozen=True, slots=True)
+class AgentSnapshot:
+    """Immutable subset of Agent needed by tool/booking requests; safe to share across requests."""
+    id: UUID
+    organization_id: UUID
+    cal_com_api_key: str | None
+    cal_com_event_type_id: int | None
+    updated_at: datetime | None = None  # version key for per-agent compiled state (qualification rules)
+
+    @classmethod
+    def from_agent(cls, agent: Agent) -> "AgentSnapshot":
+        return cls(
+            id=agent.id,
+            organization_id=agent.organization_id,
+            cal_com_api_key=agent.cal_com_api_key,
+            cal_com_event_type_id=agent.cal_com_event_type_id,
+            updated_at=agent.updated_at,
+        )
+
+
+# X-API-KEY -> AgentSnapshot
+agent_key_cache: TTLCache[str, AgentSnapshot] = TTLCache(
+    max_size=get_settings().AGENT_CACHE_MAX_SIZE,
+    ttl=get_settings().AGENT_CACHE_TTL_SEC,
+)
+
+
+def invalidate_agent_key(tool_api_key: str | None) -> None:
+    """Drop a cached agent after it was created/changed so the next request re-reads it."""
+    if tool_api_key:
+        agent_key_cache.pop(tool_api_key)
+
+
 def require_vapi_key(
     settings: Settings = Depends(get_settings),
     x_api_key: str | None = Header(default=None, alias="X-API-KEY"),
@@ -41,14 +80,39 @@ def get_current_user(
 def get_agent_from_key(
     db: Session = Depends(get_db),
     x_api_key: str | None = Header(default=None, alias="X-API-KEY"),
-) -> Agent:
+) -> AgentSnapshot:
     """Resolve org/agent from per-agent tool API key (VAPI tool requests)."""
     if not x_api_key:
         raise HTTPException(status_code=401, detail="Missing X-API-KEY")
-    agent = db.query(Agent).filter(Agent.tool_api_key == x_api_key).first()
+    snapshot = agent_key_cache.get(x_api_key)
+    if snapshot:
+        return snapshot
+    with phase("agent_key_db"):
+        agent = db.query(Agent).filter(Agent.tool_api_key == x_api_key).first()
+    if not agent:
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    snapshot = AgentSnapshot.from_agent(agent)
+    agent_key_cache.set(x_api_key, snapshot)
+    return snapshot
+
+
+async def get_agent_from_key_async(
+    db: AsyncSession = Depends(get_async_db),
+    x_api_key: str | None = Header(default=None, alias="X-API-KEY"),
+) -> AgentSnapshot:
+    """Async variant of get_agent_from_key for routes running on the event loop."""
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="Missing X-API-KEY")
+    snapshot = agent_key_cache.get(x_api_key)
+    if snapshot:
+        return snapshot
+    with phase("agent_key_db"):
+        agent = (await db.execute(select(Agent).where(Agent.tool_api_key == x_api_key))).scalars().first()
     if not agent:
         raise HTTPException(status_code=401, detail="Invalid API key")
-    return agent
+    snapshot = AgentSnapshot.from_agent(agent)
+    agent_key_cache.set(x_api_key, snapshot)
+    return snapshot
 
 
 def get_current_organization(
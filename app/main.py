@@ -1,5 +1,6 @@
 from contextlib import asynccontextmanager
 import logging
+from time import perf_counter
 
 from dotenv import load_dotenv
 from fastapi import APIRouter, FastAPI, HTTPException, Request, status
@@ -9,9 +10,20 @@ from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
 from app.config import get_settings
-from app.routers import auth, bookings, orgs, tools, vapi_webhooks
+from app.routers import auth, bookings, internal, orgs, tools, vapi_webhooks
+from app.services.audit import call_event_writer, tool_call_writer
+from app.services.availability_warmer import availability_warmer
+from app.services.cal_com import cal_com
+from app.services.webhook_ingest import webhook_ingest
 from app.utils.api_utils import tags_metadata
 from app.utils.logging import setup_logging
+from app.utils.timing import (
+    latency_histograms,
+    route_template,
+    server_timing_header,
+    start_request_timing,
+    summarize,
+)
 from app.utils.responses import error_response
 from fastapi.openapi.utils import get_openapi
 
@@ -21,7 +33,19 @@ load_dotenv()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setup_logging(get_settings().LOG_LEVEL)
+    cal_com.start()
+    tool_call_writer.start()
+    call_event_writer.start()
+    if get_settings().WEBHOOK_INGEST_MODE == "queue":
+        webhook_ingest.start()
+    if get_settings().AVAILABILITY_WARMER_MODE != "off" and get_settings().AVAILABILITY_CACHE_ENABLED:
+        availability_warmer.start()
     yield
+    await availability_warmer.stop()
+    await webhook_ingest.stop()
+    await call_event_writer.stop()
+    await tool_call_writer.stop()
+    await cal_com.stop()
 
 app = FastAPI(
     title="Klarnow Voice Agent API",
@@ -114,6 +138,7 @@ api.include_router(orgs.router)
 api.include_router(tools.router)
 api.include_router(bookings.router)
 api.include_router(vapi_webhooks.router)
+api.include_router(internal.router)
 
 # Include routers
 app.include_router(api)
@@ -127,6 +152,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """Expose per-phase timings as Server-Timing and feed the per-route latency histograms."""
+    phases = start_request_timing()
+    start = perf_counter()
+    response = await call_next(request)
+    totals = summarize(phases)
+    totals["total"] = perf_counter() - start
+    response.headers["Server-Timing"] = server_timing_header(totals)
+    if request.scope.get("route") is not None:
+        route = route_template(request.url.path, request.path_params)
+        for name, seconds in totals.items():
+            latency_histograms.observe(route, name, seconds)
+    return response
+
 @app.middleware("http")
 async def log_raw_body(request: Request, call_next):
     if get_settings().DEBUG:
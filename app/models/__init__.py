@@ -7,4 +7,6 @@ from app.models.leads import Lead
 from app.models.handoffs import Handoff
 from app.models.qualifications import Qualification
 from app.models.fit_check import FitCheck
-from app.models.tool_call import ToolCall
\ No newline at end of file
+from app.models.tool_call import ToolCall
+from app.models.transcript_segment import TranscriptSegment
+from app.models.call_event import CallEvent
\ No newline at end of file
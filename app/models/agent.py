@@ -34,6 +34,7 @@ class Agent(Base):
     voice_provider: Mapped[str | None] = mapped_column(String(64), nullable=True)
     voice_id: Mapped[str | None] = mapped_column(String(120), nullable=True)
     enabled_tool_names: Mapped[list | None] = mapped_column(JSON, nullable=True)  # override; else from use_case
+    qualification_rules: Mapped[dict | None] = mapped_column(JSON, nullable=True)  # else default scoring
     vapi_assistant_id: Mapped[str | None] = mapped_column(String(255), unique=True, nullable=True, index=True)
     vapi_phone_number_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
     cal_com_api_key: Mapped[str | None] = mapped_column(Text, nullable=True)  # encrypted in production
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Identity,
+    Index,
+    String,
+    Enum as SAEnum,
+    func,
+)
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+from app.models.enums import CallEventType
+
+
+class CallEvent(Base):
+    """Append-only log of VAPI webhook events (kept out of tool_calls, which is for tool invocations)."""
+
+    __tablename__ = "call_events"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(always=True), primary_key=True)
+
+    organization_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    call_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("calls.id", ondelete="CASCADE"), nullable=False
+    )
+
+    event_type: Mapped[CallEventType] = mapped_column(SAEnum(CallEventType, name="call_event_type_enum"), nullable=False)
+    event_name: Mapped[Optional[str]] = mapped_column(String(64))  # raw VAPI name, kept only for `other`
+
+    payload: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONB)
+    payload_truncated: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="false")
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+    __table_args__ = (
+        Index("idx_call_events_call_id", "call_id", "id"),
+    )
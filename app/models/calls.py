@@ -11,6 +11,7 @@ if TYPE_CHECKING:
     from app.models.bookings import Booking
     from app.models.handoffs import Handoff
     from app.models.tool_call import ToolCall
+    from app.models.transcript_segment import TranscriptSegment
     from app.models.organization import Organization
     from app.models.agent import Agent
 
@@ -76,6 +77,9 @@ class Call(Base):
     bookings: Mapped[List["Booking"]] = relationship("Booking", back_populates="call", cascade="all, delete-orphan")
     handoffs: Mapped[List["Handoff"]] = relationship(back_populates="call", cascade="all, delete-orphan")
     tool_calls: Mapped[List["ToolCall"]] = relationship(back_populates="call", cascade="all, delete-orphan")
+    transcript_segments: Mapped[List["TranscriptSegment"]] = relationship(
+        back_populates="call", cascade="all, delete-orphan", passive_deletes=True, order_by="TranscriptSegment.seq"
+    )
 
     __table_args__ = (
         Index("idx_calls_lead_id", "lead_id"),
@@ -56,3 +56,12 @@ class OrgRole(str, enum.Enum):
     owner = "owner"
     admin = "admin"
     member = "member"
+
+
+class CallEventType(str, enum.Enum):
+    call_started = "call.started"
+    call_ended = "call.ended"
+    transcript = "transcript"
+    transcript_partial = "transcript.partial"
+    transcript_final = "transcript.final"
+    other = "other"
@@ -49,8 +49,11 @@ class ToolCall(Base):
     success: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default="true")
     error: Mapped[Optional[str]] = mapped_column(Text)
 
+    # Part of the primary key because the table is range-partitioned by month on it
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), nullable=False, server_default=func.now()
+        DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now()
     )
 
-    call: Mapped[Optional["Call"]] = relationship(back_populates="tool_calls")
\ No newline at end of file
+    call: Mapped[Optional["Call"]] = relationship(back_populates="tool_calls")
+
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
\ No newline at end of file
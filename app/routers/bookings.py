@@ -1,12 +1,12 @@
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from loguru import logger
 from starlette import status
 
-from app.deps import get_agent_from_key
-from app.models import Agent
+from app.deps import AgentSnapshot, get_agent_from_key_async
 from app.schemas.bookings import (
     CalComAvailabilityResponse,
     CalComBookingResponse,
@@ -14,7 +14,7 @@ from app.schemas.bookings import (
     CreateBookingRequest,
 )
 from app.schemas.responses import SuccessResponse
-from app.services.bookings import create_booking, get_availability, list_bookings
+from app.services.bookings import create_booking, default_availability_window, get_availability, list_bookings
 from app.utils.responses import responses_example
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
@@ -29,7 +29,7 @@ async def list_cal_com_bookings(
     time_min: Optional[str] = Query(None, description="Minimum time (ISO 8601)"),
     time_max: Optional[str] = Query(None, description="Maximum time (ISO 8601)"),
     event_type_id: Optional[int] = Query(None, description="Event type ID to filter"),
-    agent: Agent = Depends(get_agent_from_key),
+    agent: AgentSnapshot = Depends(get_agent_from_key_async),
 ):
     try:
         # Parse datetime strings if provided
@@ -54,7 +54,7 @@ async def list_cal_com_bookings(
                     detail="Invalid time_max format. Use ISO 8601 format (e.g., 2026-01-27T18:00:00Z)"
                 )
         
-        result = list_bookings(
+        result = await list_bookings(
             time_min=time_min_dt,
             time_max=time_max_dt,
             event_type_id=event_type_id,
@@ -85,7 +85,7 @@ async def list_cal_com_bookings(
 )
 async def create_cal_com_booking(
     booking_data: CreateBookingRequest,
-    agent: Agent = Depends(get_agent_from_key),
+    agent: AgentSnapshot = Depends(get_agent_from_key_async),
 ):
     try:
         # Apply defaults if not provided
@@ -106,7 +106,7 @@ async def create_cal_com_booking(
             
             booking_data.end = start_time + timedelta(minutes=15)
         
-        booking = create_booking(
+        booking = await create_booking(
             user_id=booking_data.email,
             booking_data=booking_data,
             cal_com_api_key=agent.cal_com_api_key,
@@ -142,15 +142,14 @@ async def get_available_slots(
     time_zone: Optional[str] = Query(None, description="Time zone (e.g., Europe/London)"),
     duration: Optional[int] = Query(None, description="Duration in minutes"),
     format: Optional[str] = Query(None, description="Format: 'range' or 'time'"),
-    agent: Agent = Depends(get_agent_from_key),
+    agent: AgentSnapshot = Depends(get_agent_from_key_async),
 ):
     try:
-        # Set defaults if not provided
-        now = datetime.now(timezone.utc)
+        # Set defaults if not provided: today 00:00:00 UTC to 4 weeks from today 23:59:59 UTC
+        default_start, default_end = default_availability_window()
         
         if start is None:
-            # Default to today at 00:00:00 UTC
-            start_dt = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            start_dt = default_start
         else:
             try:
                 start_dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
@@ -161,8 +160,7 @@ async def get_available_slots(
                 )
         
         if end is None:
-            # Default to 4 weeks from today at 23:59:59 UTC
-            end_dt = (now + timedelta(weeks=4)).replace(hour=23, minute=59, second=59, microsecond=999999)
+            end_dt = default_end
         else:
             try:
                 end_dt = datetime.fromisoformat(end.replace('Z', '+00:00'))
@@ -179,7 +177,7 @@ async def get_available_slots(
                 detail="Start time must be before end time"
             )
         
-        availability = get_availability(
+        slots = await get_availability(
             start=start_dt,
             end=end_dt,
             event_type_id=event_type_id,
@@ -191,12 +189,16 @@ async def get_available_slots(
             cal_com_base_url=None,
         )
         
-        total_slots = sum(len(slots) for slots in availability.slots.values())
+        total_slots = sum(len(day) for day in slots.values())
         
-        return SuccessResponse(
-            isSuccess=True,
-            message=f"Retrieved {total_slots} available slots across {len(availability.slots)} days",
-            data=availability,
+        # Already in the response shape: serialize directly instead of validating a TimeSlot per slot
+        return Response(
+            content=orjson.dumps({
+                "isSuccess": True,
+                "message": f"Retrieved {total_slots} available slots across {len(slots)} days",
+                "data": {"slots": slots},
+            }),
+            media_type="application/json",
         )
         
     except HTTPException:
@@ -0,0 +1,43 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from app.deps import agent_key_cache, require_vapi_key
+from app.services.audit import call_event_writer, call_events_sampled_out, tool_call_writer
+from app.services.availability_warmer import availability_warmer
+from app.services.bookings import availability_cache
+from app.services.cal_com import cal_com
+from app.services.calls import call_contexts
+from app.services.idempotency import tool_replays
+from app.services.sequencing import call_sequencer
+from app.services.transcripts import live_partials
+from app.services.webhook_ingest import webhook_ingest
+from app.services.webhooks import assistant_cache
+from app.utils.timing import latency_histograms
+
+router = APIRouter(prefix="/internal", tags=["internal"], dependencies=[Depends(require_vapi_key)])
+
+
+@router.get("/metrics")
+def get_metrics() -> Dict[str, Any]:
+    """In-process cache/queue counters for this worker (platform key required)."""
+    return {
+        "agent_key_cache": agent_key_cache.stats(),
+        "assistant_cache": assistant_cache.stats(),
+        "tool_call_writer": tool_call_writer.stats(),
+        "call_event_writer": {**call_event_writer.stats(), "sampled_out": dict(call_events_sampled_out)},
+        "call_contexts": call_contexts.stats(),
+        "tool_replays": tool_replays.stats(),
+        "webhook_ingest": webhook_ingest.stats(),
+        "call_sequencer": call_sequencer.stats(),
+        "live_partials": live_partials.stats(),
+        "cal_com": cal_com.stats(),
+        "availability_cache": availability_cache.stats(),
+        "availability_warmer": availability_warmer.stats(),
+    }
+
+
+@router.get("/latency")
+def get_latency() -> Dict[str, Any]:
+    """Per-route, per-phase latency histograms (ms) collected from Server-Timing phases."""
+    return latency_histograms.snapshot()
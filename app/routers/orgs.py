@@ -1,16 +1,27 @@
 import secrets
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.db import get_db
-from app.deps import get_current_organization, get_current_user
-from app.models import Agent, Booking, Call, Lead, Organization, OrganizationMember, ToolCall, User
+from app.deps import get_current_organization, get_current_user, invalidate_agent_key
+from app.models import Agent, Booking, Call, CallEvent, Lead, Organization, OrganizationMember, ToolCall, User
 from app.models.enums import OrgRole
-from app.schemas.agents import AgentCreate, AgentOut, AgentUpdate
-from app.schemas.dashboard import BookingListItem, CallDetail, CallListItem, LeadListItem, ToolCallItem
+from app.schemas.agents import AgentCreate, AgentOut, AgentUpdate, QualificationRules
+from app.schemas.dashboard import (
+    BookingListItem,
+    CallDetail,
+    CallEventItem,
+    CallListItem,
+    LeadListItem,
+    LivePartialItem,
+    ToolCallItem,
+)
 from app.schemas.orgs import OrganizationCreate, OrganizationOut, OrganizationUpdate
+from app.services.qualification import rescore_organization_job
+from app.services.transcripts import assemble_transcript, live_partials
+from app.services.webhooks import invalidate_assistant
 
 router = APIRouter(prefix="/orgs", tags=["organizations"])
 
@@ -112,6 +123,7 @@ def create_agent(
     db.add(agent)
     db.commit()
     db.refresh(agent)
+    invalidate_agent_key(agent.tool_api_key)
     return _agent_out(agent)
 
 
@@ -163,8 +175,37 @@ def update_agent(
         agent.voice_id = data.voice_id
     if data.cal_com_api_key is not None:
         agent.cal_com_api_key = data.cal_com_api_key
+    previous_assistant_id = agent.vapi_assistant_id
+    if data.vapi_assistant_id is not None:
+        agent.vapi_assistant_id = data.vapi_assistant_id or None
     db.commit()
     db.refresh(agent)
+    invalidate_agent_key(agent.tool_api_key)
+    if agent.vapi_assistant_id != previous_assistant_id:
+        invalidate_assistant(previous_assistant_id, agent.vapi_assistant_id)
+    return _agent_out(agent)
+
+
+@router.put("/{org_id}/agents/{agent_id}/qualification-rules", response_model=AgentOut)
+def set_qualification_rules(
+    agent_id: UUID,
+    data: QualificationRules,
+    background_tasks: BackgroundTasks,
+    org: Organization = Depends(get_current_organization),
+    db: Session = Depends(get_db),
+):
+    """Replace the agent's scoring rules and rescore its past qualifications in the background."""
+    agent = db.query(Agent).filter(
+        Agent.id == agent_id,
+        Agent.organization_id == org.id,
+    ).first()
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    agent.qualification_rules = data.model_dump(mode="json")
+    db.commit()
+    db.refresh(agent)
+    invalidate_agent_key(agent.tool_api_key)
+    background_tasks.add_task(rescore_organization_job, org.id, agent.id)
     return _agent_out(agent)
 
 
@@ -182,6 +223,7 @@ def _agent_out(agent: Agent) -> AgentOut:
         voice_id=agent.voice_id,
         vapi_assistant_id=agent.vapi_assistant_id,
         cal_com_event_type_id=agent.cal_com_event_type_id,
+        qualification_rules=agent.qualification_rules,
         created_at=agent.created_at,
     )
 
@@ -249,6 +291,12 @@ def get_call_detail(
         .order_by(ToolCall.created_at)
         .all()
     )
+    events = (
+        db.query(CallEvent)
+        .filter(CallEvent.call_id == call.id)
+        .order_by(CallEvent.id)
+        .all()
+    )
     return CallDetail(
         id=str(call.id),
         vapi_call_id=call.vapi_call_id,
@@ -257,7 +305,7 @@ def get_call_detail(
         started_at=call.started_at,
         ended_at=call.ended_at,
         duration_sec=call.duration_sec,
-        transcript=call.transcript,
+        transcript=call.transcript if call.transcript is not None else assemble_transcript(db, call.id),
         recording_url=call.recording_url,
         outcome_tag=call.outcome_tag.value if call.outcome_tag else None,
         outcome_note=call.outcome_note,
@@ -274,6 +322,22 @@ def get_call_detail(
             )
             for tc in tool_calls
         ],
+        events=[
+            CallEventItem(
+                event_type=ev.event_type.value,
+                event_name=ev.event_name,
+                payload=ev.payload,
+                payload_truncated=ev.payload_truncated,
+                created_at=ev.created_at,
+            )
+            for ev in events
+        ],
+        live_partials=[
+            LivePartialItem(role=lp.role, text=lp.text, updated_at=lp.updated_at)
+            for lp in live_partials.get(call.organization_id, call.vapi_call_id)
+        ]
+        if call.ended_at is None
+        else [],
     )
 
 
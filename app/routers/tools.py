@@ -7,139 +7,69 @@ from app.schemas.tools import (AvailabilityResponse,
                                 FitCheckSaveRequest, FitCheckSaveResponse, 
                                 HandoffRequest, HandoffResponse, OutcomeLogRequest, 
                                 OutcomeLogResponse, QualifyRequest, QualifyResponse, 
-                                UpsertLeadRequest, UpsertLeadResponse
+                                UpsertLeadRequest, UpsertLeadResponse,
+                                VapiToolCall, VapiToolCallResult,
+                                VapiToolCallsRequest, VapiToolCallsResponse,
                             )
+import asyncio
+import json
 import uuid
 from datetime import datetime, timedelta
-from typing import Optional, Literal, Any, Dict
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-
-from app.db import get_db
-from app.deps import get_agent_from_key
-from app.models import Agent
+from typing import Optional, Literal, Any, Awaitable, Callable, Dict
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import AsyncSessionLocal, get_async_db
+from app.deps import AgentSnapshot, get_agent_from_key_async
+from app.services.audit import log_tool_call
+from app.services.idempotency import replay_key, tool_replays
+from app.services.qualification import get_compiled_rules, latest_fit_check_features
+from app.utils.timing import phase
+from app.services.calls import attach_lead, remember_call_context, resolve_call_context, upsert_lead_row
 from app import models
 
 router = APIRouter(prefix="/tools", tags=["Tools"])
 
-# Helpers
-# -------------------------
-def get_or_create_call(
-    db: Session,
-    vapi_call_id: str,
-    organization_id: uuid.UUID,
-    agent_id: Optional[uuid.UUID],
-) -> models.Call:
-    call = (
-        db.query(models.Call)
-        .filter(
-            models.Call.organization_id == organization_id,
-            models.Call.vapi_call_id == vapi_call_id,
-        )
-        .first()
-    )
-    if call:
-        return call
-    call = models.Call(
-        vapi_call_id=vapi_call_id,
-        organization_id=organization_id,
-        agent_id=agent_id,
-    )
-    db.add(call)
-    db.flush()
-    return call
-
-
-def log_tool_call(
-    db: Session,
-    organization_id: uuid.UUID,
-    call_id: Optional[uuid.UUID],
-    tool_name: str,
-    request_json: Dict[str, Any],
-    response_json: Dict[str, Any],
-    success: bool = True,
-    error: Optional[str] = None,
-) -> None:
-    db.add(
-        models.ToolCall(
-            organization_id=organization_id,
-            call_id=call_id,
-            tool_name=tool_name,
-            request_json=request_json,
-            response_json=response_json,
-            success=success,
-            error=error,
-        )
-    )
+LEAD_FIELDS = ("name", "business_name", "role", "email", "industry", "location", "source")
 
 
-# Endpoints
+# Handlers
 # -------------------------
-@router.post("/leads/upsert", response_model=UpsertLeadResponse)
-def upsert_lead(
-    payload: UpsertLeadRequest,
-    agent: Agent = Depends(get_agent_from_key),
-    db: Session = Depends(get_db),
-) -> UpsertLeadResponse:
+async def _upsert_lead(payload: UpsertLeadRequest, agent: AgentSnapshot, db: AsyncSession) -> Dict[str, Any]:
     org_id = agent.organization_id
     agent_id = agent.id
     vapi_call_id = payload.call_id
-    call = get_or_create_call(db, vapi_call_id, org_id, agent_id) if vapi_call_id else None
-
-    lead = (
-        db.query(models.Lead)
-        .filter(models.Lead.organization_id == org_id, models.Lead.phone == payload.phone)
-        .first()
-    )
-    if lead:
-        status = "updated"
-    else:
-        lead = models.Lead(organization_id=org_id, phone=payload.phone)
-        db.add(lead)
-        status = "created"
-
-    for field in ["name", "business_name", "role", "email", "industry", "location", "source"]:
-        val = getattr(payload, field)
-        if val is not None:
-            setattr(lead, field, val)
+    ctx = await resolve_call_context(db, vapi_call_id, org_id, agent_id) if vapi_call_id else None
 
-    db.flush()
+    fields = {f: getattr(payload, f) for f in LEAD_FIELDS if getattr(payload, f) is not None}
+    lead_id, created = await upsert_lead_row(db, org_id, payload.phone, fields)
+    status = "created" if created else "updated"
 
-    if call and not call.lead_id:
-        call.lead_id = lead.id
+    if ctx:
+        ctx = await attach_lead(db, ctx, org_id, lead_id, validate=False)
 
-    resp = {"lead_id": str(lead.id), "status": status}
-    log_tool_call(db, org_id, call.id if call else None, "upsertLead", payload.model_dump(mode="json"), resp)
-
-    db.commit()
-    return UpsertLeadResponse(**resp)  # pyright: ignore[reportArgumentType]
+    resp = {"lead_id": str(lead_id), "status": status}
+    with phase("commit"):
+        await db.commit()
+    if ctx and vapi_call_id:
+        remember_call_context(org_id, vapi_call_id, ctx)
+    log_tool_call(org_id, ctx.call_id if ctx else None, "upsertLead", payload.model_dump(mode="json"), resp)
+    return resp
 
 
-@router.post("/fit-check/save", response_model=FitCheckSaveResponse)
-def save_fit_check(
-    payload: FitCheckSaveRequest,
-    agent: Agent = Depends(get_agent_from_key),
-    db: Session = Depends(get_db),
-) -> FitCheckSaveResponse:
+async def _save_fit_check(payload: FitCheckSaveRequest, agent: AgentSnapshot, db: AsyncSession) -> Dict[str, Any]:
     org_id = agent.organization_id
-    call = get_or_create_call(db, payload.call_id, org_id, agent.id)
-
-    lead = (
-        db.query(models.Lead)
-        .filter(models.Lead.id == payload.lead_id, models.Lead.organization_id == org_id)
-        .first()
-    )
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead not found")
-
-    if not call.lead_id:
-        call.lead_id = lead.id
+    ctx = await resolve_call_context(db, payload.call_id, org_id, agent.id)
+    ctx = await attach_lead(db, ctx, org_id, payload.lead_id)
 
     fit = models.FitCheck(
         organization_id=org_id,
-        call_id=call.id,
-        lead_id=lead.id,
+        call_id=ctx.call_id,
+        lead_id=payload.lead_id,
         business_offer=payload.business_offer,
         lead_sources=payload.lead_sources,
         weekly_enquiries=payload.weekly_enquiries,
@@ -150,47 +80,37 @@ def save_fit_check(
         primary_intent=payload.primary_intent,
     )
     db.add(fit)
-    db.flush()
+    with phase("flush"):
+        await db.flush()
 
     resp = {"fit_check_id": str(fit.id)}
-    log_tool_call(db, org_id, call.id, "saveFitCheck", payload.model_dump(mode="json"), resp)
-
-    db.commit()
-    return FitCheckSaveResponse(**resp)
+    with phase("commit"):
+        await db.commit()
+    remember_call_context(org_id, payload.call_id, ctx)
+    log_tool_call(org_id, ctx.call_id, "saveFitCheck", payload.model_dump(mode="json"), resp)
+    return resp
 
 
-@router.post("/qualification/score", response_model=QualifyResponse)
-def qualify_and_tag(
-    payload: QualifyRequest,
-    agent: Agent = Depends(get_agent_from_key),
-    db: Session = Depends(get_db),
-) -> QualifyResponse:
+async def _qualify_and_tag(payload: QualifyRequest, agent: AgentSnapshot, db: AsyncSession) -> Dict[str, Any]:
     org_id = agent.organization_id
-    call = get_or_create_call(db, payload.call_id, org_id, agent.id)
-
-    lead = (
-        db.query(models.Lead)
-        .filter(models.Lead.id == payload.lead_id, models.Lead.organization_id == org_id)
-        .first()
-    )
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead not found")
+    ctx = await resolve_call_context(db, payload.call_id, org_id, agent.id)
+    ctx = await attach_lead(db, ctx, org_id, payload.lead_id)
 
-    if not call.lead_id:
-        call.lead_id = lead.id
+    rules = await get_compiled_rules(db, agent.id, agent.updated_at)
+    features: Dict[str, Any] = {
+        "diagnosis_tag": payload.diagnosis_tag,
+        "one_sentence_summary": payload.one_sentence_summary,
+    }
+    if rules.needs_fit_check:
+        features.update(await latest_fit_check_features(db, ctx.call_id))
+    score, action = rules.score(features)
 
-    score = 50
-    if payload.diagnosis_tag:
-        score += 10
-    if payload.one_sentence_summary:
-        score += 10
-
-    recommended_action: Literal["book", "park", "not-fit", "transfer"] = "book" if score >= 55 else "park"
+    recommended_action: Literal["book", "park", "not-fit", "transfer"] = action  # pyright: ignore[reportAssignmentType]
 
     q = models.Qualification(
         organization_id=org_id,
-        call_id=call.id,
-        lead_id=lead.id,
+        call_id=ctx.call_id,
+        lead_id=payload.lead_id,
         diagnosis_tag=payload.diagnosis_tag,
         one_sentence_summary=payload.one_sentence_summary,
         score=score,
@@ -198,13 +118,15 @@ def qualify_and_tag(
         notes=payload.notes,
     )
     db.add(q)
-    db.flush()
+    with phase("flush"):
+        await db.flush()
 
     resp = {"qualification_id": str(q.id), "score": score, "recommended_action": recommended_action}
-    log_tool_call(db, org_id, call.id, "qualifyAndTag", payload.model_dump(mode="json"), resp)
-
-    db.commit()
-    return QualifyResponse(**resp)
+    with phase("commit"):
+        await db.commit()
+    remember_call_context(org_id, payload.call_id, ctx)
+    log_tool_call(org_id, ctx.call_id, "qualifyAndTag", payload.model_dump(mode="json"), resp)
+    return resp
 
 
 # @router.get("/calendar/availability", response_model=AvailabilityResponse)
@@ -271,58 +193,186 @@ def qualify_and_tag(
 #     return BookAuditResponse(**resp)
 
 
-@router.post("/outcome/log", response_model=OutcomeLogResponse)
-def log_outcome(
-    payload: OutcomeLogRequest,
-    agent: Agent = Depends(get_agent_from_key),
-    db: Session = Depends(get_db),
-) -> OutcomeLogResponse:
+async def _log_outcome(payload: OutcomeLogRequest, agent: AgentSnapshot, db: AsyncSession) -> Dict[str, Any]:
     org_id = agent.organization_id
-    call = get_or_create_call(db, payload.call_id, org_id, agent.id)
+    ctx = await resolve_call_context(db, payload.call_id, org_id, agent.id)
 
-    call.outcome_tag = payload.outcome_tag  # pyright: ignore[reportAttributeAccessIssue]
-    call.outcome_note = payload.note
+    with phase("outcome_update"):
+        await db.execute(
+            update(models.Call)
+            .where(models.Call.id == ctx.call_id)
+            .values(outcome_tag=payload.outcome_tag, outcome_note=payload.note)
+        )
 
     resp = {"ok": True}
-    log_tool_call(db, org_id, call.id, "logOutcome", payload.model_dump(mode="json"), resp)
-
-    db.commit()
-    return OutcomeLogResponse(**resp)
+    with phase("commit"):
+        await db.commit()
+    remember_call_context(org_id, payload.call_id, ctx)
+    log_tool_call(org_id, ctx.call_id, "logOutcome", payload.model_dump(mode="json"), resp)
+    return resp
 
 
-@router.post("/handoff/request", response_model=HandoffResponse)
-def handoff_request(
-    payload: HandoffRequest,
-    agent: Agent = Depends(get_agent_from_key),
-    db: Session = Depends(get_db),
-) -> HandoffResponse:
+async def _handoff_request(payload: HandoffRequest, agent: AgentSnapshot, db: AsyncSession) -> Dict[str, Any]:
     org_id = agent.organization_id
-    call = get_or_create_call(db, payload.call_id, org_id, agent.id)
-
-    lead = (
-        db.query(models.Lead)
-        .filter(models.Lead.id == uuid.UUID(payload.lead_id), models.Lead.organization_id == org_id)
-        .first()
-    )
-    if not lead:
-        raise HTTPException(status_code=404, detail="Lead not found")
-
-    if not call.lead_id:
-        call.lead_id = lead.id
+    ctx = await resolve_call_context(db, payload.call_id, org_id, agent.id)
+    lead_id = uuid.UUID(payload.lead_id)
+    ctx = await attach_lead(db, ctx, org_id, lead_id)
 
     handoff = models.Handoff(
         organization_id=org_id,
-        call_id=call.id,
-        lead_id=lead.id,
+        call_id=ctx.call_id,
+        lead_id=lead_id,
         reason=payload.reason,
         target_phone=payload.target_phone,
         status="queued",
     )
     db.add(handoff)
-    db.flush()
+    with phase("flush"):
+        await db.flush()
 
     resp = {"handoff_id": str(handoff.id), "status": "queued", "instruction": "I’m connecting you now. One moment please."}
-    log_tool_call(db, org_id, call.id, "handoffRequest", payload.model_dump(mode="json"), resp)
+    with phase("commit"):
+        await db.commit()
+    remember_call_context(org_id, payload.call_id, ctx)
+    log_tool_call(org_id, ctx.call_id, "handoffRequest", payload.model_dump(mode="json"), resp)
+    return resp
+
+
+# Endpoints
+# -------------------------
+# VAPI retries tool requests on timeout; tool_replays runs each distinct request once
+# and hands retries the stored response.
+@router.post("/leads/upsert", response_model=UpsertLeadResponse)
+async def upsert_lead(
+    payload: UpsertLeadRequest,
+    agent: AgentSnapshot = Depends(get_agent_from_key_async),
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+) -> UpsertLeadResponse:
+    key = replay_key(agent.id, "upsertLead", payload, idempotency_key)
+    resp = await tool_replays.run(key, lambda: _upsert_lead(payload, agent, db))
+    return UpsertLeadResponse(**resp)  # pyright: ignore[reportArgumentType]
+
+
+@router.post("/fit-check/save", response_model=FitCheckSaveResponse)
+async def save_fit_check(
+    payload: FitCheckSaveRequest,
+    agent: AgentSnapshot = Depends(get_agent_from_key_async),
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+) -> FitCheckSaveResponse:
+    key = replay_key(agent.id, "saveFitCheck", payload, idempotency_key)
+    resp = await tool_replays.run(key, lambda: _save_fit_check(payload, agent, db))
+    return FitCheckSaveResponse(**resp)
 
-    db.commit()
+
+@router.post("/qualification/score", response_model=QualifyResponse)
+async def qualify_and_tag(
+    payload: QualifyRequest,
+    agent: AgentSnapshot = Depends(get_agent_from_key_async),
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+) -> QualifyResponse:
+    key = replay_key(agent.id, "qualifyAndTag", payload, idempotency_key)
+    resp = await tool_replays.run(key, lambda: _qualify_and_tag(payload, agent, db))
+    return QualifyResponse(**resp)
+
+
+@router.post("/outcome/log", response_model=OutcomeLogResponse)
+async def log_outcome(
+    payload: OutcomeLogRequest,
+    agent: AgentSnapshot = Depends(get_agent_from_key_async),
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+) -> OutcomeLogResponse:
+    key = replay_key(agent.id, "logOutcome", payload, idempotency_key)
+    resp = await tool_replays.run(key, lambda: _log_outcome(payload, agent, db))
+    return OutcomeLogResponse(**resp)
+
+
+@router.post("/handoff/request", response_model=HandoffResponse)
+async def handoff_request(
+    payload: HandoffRequest,
+    agent: AgentSnapshot = Depends(get_agent_from_key_async),
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+) -> HandoffResponse:
+    key = replay_key(agent.id, "handoffRequest", payload, idempotency_key)
+    resp = await tool_replays.run(key, lambda: _handoff_request(payload, agent, db))
     return HandoffResponse(**resp)  # pyright: ignore[reportArgumentType]
+
+
+# Batched VAPI "tool-calls" server messages
+# -------------------------
+TOOL_HANDLERS: Dict[str, tuple[type[BaseModel], Callable[[Any, AgentSnapshot, AsyncSession], Awaitable[Dict[str, Any]]]]] = {
+    "upsertLead": (UpsertLeadRequest, _upsert_lead),
+    "saveFitCheck": (FitCheckSaveRequest, _save_fit_check),
+    "qualifyAndTag": (QualifyRequest, _qualify_and_tag),
+    "logOutcome": (OutcomeLogRequest, _log_outcome),
+    "handoffRequest": (HandoffRequest, _handoff_request),
+}
+
+# Run before (and in this order) the concurrent rest of a batch: later tools read what they write
+SEQUENTIAL_TOOLS = ("upsertLead", "saveFitCheck")
+
+
+async def _dispatch_tool_call(
+    tc: VapiToolCall,
+    vapi_call_id: Optional[str],
+    agent: AgentSnapshot,
+) -> VapiToolCallResult:
+    entry = TOOL_HANDLERS.get(tc.function.name)
+    if entry is None:
+        return VapiToolCallResult(toolCallId=tc.id, error=f"Unsupported tool: {tc.function.name}")
+    request_model, handler = entry
+
+    args = tc.function.arguments or {}
+    try:
+        if isinstance(args, str):
+            args = json.loads(args)
+        if not isinstance(args, dict):
+            raise ValueError("arguments must be a JSON object")
+        if vapi_call_id and not args.get("call_id"):
+            args = {**args, "call_id": vapi_call_id}
+        payload = request_model.model_validate(args)
+    except ValueError as e:
+        return VapiToolCallResult(toolCallId=tc.id, error="Invalid arguments: " + " ".join(str(e).split()))
+
+    key = replay_key(agent.id, tc.function.name, payload, tc.id)
+    try:
+        # own session per tool call: an AsyncSession cannot be shared by concurrent tasks
+        async with AsyncSessionLocal() as db:
+            resp = await tool_replays.run(key, lambda: handler(payload, agent, db))
+    except HTTPException as e:
+        return VapiToolCallResult(toolCallId=tc.id, error=str(e.detail))
+    except Exception as e:
+        logger.error("Tool call {} ({}) failed: {}", tc.id, tc.function.name, e, exc_info=True)
+        return VapiToolCallResult(toolCallId=tc.id, error="Tool execution failed")
+    return VapiToolCallResult(toolCallId=tc.id, result=json.dumps(resp))
+
+
+@router.post("/tool-calls", response_model=VapiToolCallsResponse, response_model_exclude_none=True)
+async def vapi_tool_calls(
+    body: VapiToolCallsRequest,
+    agent: AgentSnapshot = Depends(get_agent_from_key_async),
+) -> VapiToolCallsResponse:
+    """Run every entry of a VAPI tool-calls message and answer with one results array.
+
+    upsertLead and then saveFitCheck calls run first, one at a time, since the others
+    may read the lead/fit check they write (qualifyAndTag scores the latest fit check);
+    the remaining calls are independent and run concurrently.
+    """
+    msg = body.message
+    vapi_call_id = msg.call.id if msg.call else None
+    results: list[Optional[VapiToolCallResult]] = [None] * len(msg.toolCallList)
+
+    for name in SEQUENTIAL_TOOLS:
+        for i, tc in enumerate(msg.toolCallList):
+            if tc.function.name == name:
+                results[i] = await _dispatch_tool_call(tc, vapi_call_id, agent)
+    concurrent = [i for i, tc in enumerate(msg.toolCallList) if tc.function.name not in SEQUENTIAL_TOOLS]
+    done = await asyncio.gather(*(_dispatch_tool_call(msg.toolCallList[i], vapi_call_id, agent) for i in concurrent))
+    for i, res in zip(concurrent, done):
+        results[i] = res
+
+    return VapiToolCallsResponse(results=[r for r in results if r is not None])
@@ -1,98 +1,110 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Any, Dict
+from typing import AsyncIterator, Dict, List
 
-from fastapi import APIRouter, Depends
-from loguru import logger
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import get_db
-from app import models
+from app.config import get_settings
+from app.db import get_async_db
+from app.deps import require_vapi_key
+from app.schemas.webhooks import BulkIngestResult, VapiEvent, WebhookEvent
+from app.services.webhook_ingest import webhook_ingest
+from app.services.webhooks import buffer_partial, process_call_events, process_event_batch
 
 router = APIRouter(prefix="/webhooks/vapi", tags=["vapi-webhooks"])
 
 
-class VapiEvent(BaseModel):
-    event: str
-    call_id: str
-    payload: Dict[str, Any]
-
-
-def _get_assistant_id(payload: Dict[str, Any]) -> str | None:
-    p = payload or {}
-    return p.get("assistantId") or (p.get("message") or {}).get("assistantId")
-
-
-@router.post("/events")
-def vapi_events(evt: VapiEvent, db: Session = Depends(get_db)) -> Dict[str, bool]:
-    assistant_id = _get_assistant_id(evt.payload)
-    agent = None
-    if assistant_id:
-        agent = db.query(models.Agent).filter(models.Agent.vapi_assistant_id == assistant_id).first()
-    if not agent:
-        logger.warning("VAPI webhook: no assistantId or agent not found, skipping call update")
+@router.post(
+    "/events",
+    openapi_extra={
+        "requestBody": {"required": True, "content": {"application/json": {"schema": VapiEvent.model_json_schema()}}}
+    },
+)
+async def vapi_events(request: Request, db: AsyncSession = Depends(get_async_db)) -> Dict[str, bool]:
+    # Parsed straight from the body with orjson, keeping only the payload fields we use: end-of-call
+    # reports carry the whole message history, which would otherwise be validated and held in memory.
+    try:
+        evt = WebhookEvent.from_bytes(await request.body(), keep_raw=get_settings().CALL_EVENT_STORE_FULL_PAYLOAD)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid VAPI event: {e}")
+    if await buffer_partial(db, evt):
         return {"ok": True}
-
-    org_id = agent.organization_id
-    agent_id = agent.id
-
-    call = (
-        db.query(models.Call)
-        .filter(
-            models.Call.organization_id == org_id,
-            models.Call.vapi_call_id == evt.call_id,
-        )
-        .first()
-    )
-    if not call:
-        call = models.Call(
-            vapi_call_id=evt.call_id,
-            organization_id=org_id,
-            agent_id=agent_id,
-        )
-        db.add(call)
-        db.flush()
-
-    p = evt.payload or {}
-
-    if evt.event in {"call.started", "call.start"}:
-        ts = p.get("startedAt") or p.get("startTime")
-        if ts:
-            try:
-                call.started_at = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-            except Exception:
-                pass
-
-    if evt.event in {"call.ended", "call.end"}:
-        ts = p.get("endedAt") or p.get("endTime")
-        if ts:
-            try:
-                call.ended_at = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-            except Exception:
-                pass
-        if p.get("durationSec") is not None:
-            call.duration_sec = int(p["durationSec"])
-        rec = p.get("recordingUrl") or p.get("recording_url")
-        if rec:
-            call.recording_url = rec
-
-    if evt.event in {"transcript", "call.transcript", "call.transcript.partial", "call.transcript.final"}:
-        text = p.get("text") or p.get("transcript")
-        if text:
-            call.transcript = (call.transcript or "") + (("\n" if call.transcript else "") + text)
-
-    db.add(
-        models.ToolCall(
-            organization_id=org_id,
-            call_id=call.id,
-            tool_name=f"webhook:{evt.event}",
-            request_json={"event": evt.event, "call_id": evt.call_id, "payload": evt.payload},
-            response_json={"ok": True},
-            success=True,
-        )
-    )
-
-    db.commit()
+    # In queue mode the event is acknowledged once queued. When the call's partition is full, answer 503
+    # so VAPI redelivers: processing inline would overtake the call's events still waiting in the queue.
+    if get_settings().WEBHOOK_INGEST_MODE == "queue" and webhook_ingest.running:
+        if not webhook_ingest.enqueue(evt):
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Webhook ingest queue is full")
+        return {"ok": True}
+    await process_call_events(db, [evt])
     return {"ok": True}
+
+
+async def _read_items(request: Request, keep_raw: bool) -> AsyncIterator[tuple[int, WebhookEvent | ValueError]]:
+    """Yield (position, event or parse error) from a JSON array/object body or a streamed NDJSON body.
+
+    Positions are 1-based in both cases: the array index + 1, or the NDJSON line number.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        buffer = b""
+        line_no = 0
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_no += 1
+                if line.strip():
+                    yield line_no, _parse(line, keep_raw)
+        if buffer.strip():
+            yield line_no + 1, _parse(buffer, keep_raw)
+        return
+    try:
+        data = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Body must be a JSON array or NDJSON")
+    for i, item in enumerate(data if isinstance(data, list) else [data], start=1):
+        try:
+            yield i, WebhookEvent.from_dict(item, raw=orjson.dumps(item) if keep_raw else None)
+        except ValueError as e:
+            yield i, e
+
+
+def _parse(line: bytes, keep_raw: bool) -> WebhookEvent | ValueError:
+    try:
+        return WebhookEvent.from_bytes(line, keep_raw=keep_raw)
+    except ValueError as e:
+        return e
+
+
+@router.post("/events/bulk", response_model=BulkIngestResult, dependencies=[Depends(require_vapi_key)])
+async def vapi_events_bulk(request: Request, db: AsyncSession = Depends(get_async_db)) -> BulkIngestResult:
+    """Apply many VAPI events from a JSON array or an NDJSON stream (`Content-Type: application/x-ndjson`).
+
+    Events are applied in order per call, one transaction per call and chunk; used by the event relay,
+    backfills and traffic replays. Requires the platform X-API-KEY.
+    """
+    settings = get_settings()
+    result = BulkIngestResult()
+    chunk: List[WebhookEvent] = []
+
+    def reject(position: int, reason: str) -> None:
+        result.invalid += 1
+        result.add_error(f"item {position}: {reason}")
+
+    async for position, evt in _read_items(request, settings.CALL_EVENT_STORE_FULL_PAYLOAD):
+        result.received += 1
+        if isinstance(evt, ValueError):
+            reject(position, str(evt))
+            continue
+        if await buffer_partial(db, evt):
+            result.buffered += 1
+            continue
+        chunk.append(evt)
+        if len(chunk) >= settings.WEBHOOK_BULK_CHUNK_SIZE:
+            await process_event_batch(chunk, result, settings.WEBHOOK_INGEST_WORKERS)
+            chunk = []
+    if chunk:
+        await process_event_batch(chunk, result, settings.WEBHOOK_INGEST_WORKERS)
+    return result
@@ -1,10 +1,37 @@
 from datetime import datetime
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
 from app.models.enums import UseCase
 
 
+QualificationField = Literal[
+    "response_speed",
+    "weekly_enquiries",
+    "capacity_next_weeks",
+    "primary_intent",
+    "has_followup_system",
+    "diagnosis_tag",
+    "one_sentence_summary",
+]
+
+
+class QualificationRule(BaseModel):
+    """Add `points` when the FitCheck/qualification `field` matches."""
+    field: QualificationField
+    op: Literal["eq", "in", "gte", "lte", "present"] = "eq"
+    value: Any = None
+    points: int
+
+
+class QualificationRules(BaseModel):
+    base_score: int = 50
+    book_threshold: int = Field(55, description="score >= this recommends 'book'")
+    not_fit_below: int | None = Field(None, description="score < this recommends 'not-fit' (else 'park')")
+    rules: list[QualificationRule] = Field(default_factory=list)
+
+
 class AgentCreate(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     use_case: UseCase = UseCase.lead_qualification
@@ -29,6 +56,7 @@ class AgentUpdate(BaseModel):
     voice_provider: str | None = None
     voice_id: str | None = None
     cal_com_api_key: str | None = None
+    vapi_assistant_id: str | None = None
 
 
 class AgentOut(BaseModel):
@@ -44,6 +72,7 @@ class AgentOut(BaseModel):
     voice_id: str | None
     vapi_assistant_id: str | None
     cal_com_event_type_id: int | None
+    qualification_rules: QualificationRules | None = None
     created_at: datetime
 
     class Config:
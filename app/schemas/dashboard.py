@@ -55,6 +55,23 @@ class ToolCallItem(BaseModel):
         from_attributes = True
 
 
+class CallEventItem(BaseModel):
+    event_type: str
+    event_name: str | None
+    payload: dict | None
+    payload_truncated: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class LivePartialItem(BaseModel):
+    role: str | None
+    text: str
+    updated_at: datetime
+
+
 class CallDetail(BaseModel):
     id: str
     vapi_call_id: str
@@ -70,6 +87,8 @@ class CallDetail(BaseModel):
     created_at: datetime
     lead: LeadListItem | None = None
     tool_calls: list[ToolCallItem] = []
+    events: list[CallEventItem] = []
+    live_partials: list[LivePartialItem] = []
 
     class Config:
         from_attributes = True
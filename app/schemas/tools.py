@@ -1,4 +1,4 @@
-from typing import Optional, List, Literal
+from typing import Any, Dict, Optional, List, Literal, Union
 
 from pydantic import BaseModel, EmailStr, Field
 from uuid import UUID
@@ -113,4 +113,39 @@ class HandoffRequest(BaseModel):
 class HandoffResponse(BaseModel):
     handoff_id: str
     status: Literal["queued"] = "queued"
-    instruction: str = "I’m connecting you now. One moment please."
\ No newline at end of file
+    instruction: str = "I’m connecting you now. One moment please."
+
+class VapiToolCallFunction(BaseModel):
+    name: str
+    arguments: Union[Dict[str, Any], str, None] = None
+
+
+class VapiToolCall(BaseModel):
+    id: str
+    type: str = "function"
+    function: VapiToolCallFunction
+
+
+class VapiCallRef(BaseModel):
+    id: Optional[str] = None
+
+
+class VapiToolCallsMessage(BaseModel):
+    type: Literal["tool-calls"]
+    toolCallList: List[VapiToolCall]
+    call: Optional[VapiCallRef] = None
+
+
+class VapiToolCallsRequest(BaseModel):
+    """VAPI server message carrying one or more function tool calls."""
+    message: VapiToolCallsMessage
+
+
+class VapiToolCallResult(BaseModel):
+    toolCallId: str
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+
+class VapiToolCallsResponse(BaseModel):
+    results: List[VapiToolCallResult]
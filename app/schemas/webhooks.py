@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import orjson
+from pydantic import BaseModel
+
+
+class VapiEvent(BaseModel):
+    """Request body of the VAPI webhook (documents the API; parsing goes through WebhookEvent)."""
+
+    event: str
+    call_id: str
+    payload: Dict[str, Any]
+
+
+# The only payload keys the webhook handlers read; everything else (message history, analysis,
+# artifacts of end-of-call reports) is dropped right after parsing.
+PAYLOAD_FIELDS = (
+    "id",
+    "eventId",
+    "assistantId",
+    "startedAt",
+    "startTime",
+    "endedAt",
+    "endTime",
+    "durationSec",
+    "recordingUrl",
+    "recording_url",
+    "text",
+    "transcript",
+    "transcriptType",
+    "role",
+    "timestamp",
+)
+
+
+@dataclass(slots=True)
+class WebhookEvent:
+    """A parsed VAPI webhook event holding only the payload fields we use, plus optionally the raw bytes."""
+
+    event: str
+    call_id: str
+    payload: Dict[str, Any]
+    raw: Optional[bytes] = None
+
+    @classmethod
+    def from_dict(cls, data: Any, raw: Optional[bytes] = None) -> "WebhookEvent":
+        if not isinstance(data, dict):
+            raise ValueError("event must be a JSON object")
+        event, call_id, payload = data.get("event"), data.get("call_id"), data.get("payload")
+        if not isinstance(event, str) or not isinstance(call_id, str):
+            raise ValueError("event and call_id must be strings")
+        if not isinstance(payload, dict):
+            raise ValueError("payload must be an object")
+        slim = {k: payload[k] for k in PAYLOAD_FIELDS if k in payload}
+        if "assistantId" not in slim:
+            message = payload.get("message")
+            if isinstance(message, dict) and message.get("assistantId"):
+                slim["assistantId"] = message["assistantId"]
+        return cls(event=event, call_id=call_id, payload=slim, raw=raw)
+
+    @classmethod
+    def from_bytes(cls, body: bytes, keep_raw: bool = False) -> "WebhookEvent":
+        """Parse with orjson and keep only the fields we need; raises ValueError on bad input."""
+        try:
+            data = orjson.loads(body)
+        except orjson.JSONDecodeError as e:
+            raise ValueError("invalid JSON") from e
+        return cls.from_dict(data, raw=bytes(body) if keep_raw else None)
+
+
+# Bulk ingest reports at most this many error messages; the counters still cover every item
+MAX_REPORTED_ERRORS = 20
+
+
+class BulkIngestResult(BaseModel):
+    received: int = 0
+    processed: int = 0
+    buffered: int = 0  # partial transcripts kept in memory only
+    skipped: int = 0  # unknown assistant, duplicate or stale
+    failed: int = 0
+    invalid: int = 0
+    transactions: int = 0  # committed, one per call per chunk
+    errors: List[str] = []
+
+    def add_error(self, message: str) -> None:
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
@@ -0,0 +1,265 @@
+import asyncio
+import random
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+import uuid
+
+import orjson
+from loguru import logger
+from sqlalchemy import insert
+
+from app.config import get_settings
+from app.db import AsyncSessionLocal
+from app.models.base import Base
+from app.models.enums import CallEventType
+from app import models
+
+_STOP = object()
+
+
+class BufferedWriter:
+    """Write-behind buffer that bulk-inserts rows of one model from a background task.
+
+    Rows are queued in memory and flushed as one multi-row INSERT when `batch_size`
+    rows are waiting or `flush_interval` seconds have passed since the first one.
+    When the queue is full new rows are dropped (and counted) instead of blocking
+    the request. `start`/`stop` are driven by the FastAPI lifespan; `stop` drains.
+    """
+
+    def __init__(self, model: type[Base], max_queue: int, batch_size: int, flush_interval: float):
+        self.model = model
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.high_water = max(1, int(max_queue * 0.8))
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.backpressure = 0  # enqueues that found the queue above the high-water mark
+        self.max_depth = 0
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run(), name=f"buffered-writer:{self.model.__tablename__}")
+
+    async def stop(self) -> None:
+        """Flush everything queued so far, then stop the background task."""
+        if self._task is None or self._queue is None:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        leftover = []
+        while not self._queue.empty():
+            row = self._queue.get_nowait()
+            if row is not _STOP:
+                leftover.append(row)
+        for i in range(0, len(leftover), self.batch_size):
+            await self._flush(leftover[i : i + self.batch_size])
+        self._queue = None
+
+    def enqueue(self, row: Dict[str, Any]) -> bool:
+        """Queue one row for insertion. Returns False if it was dropped."""
+        if self._queue is None:
+            self.dropped += 1
+            logger.warning("{} writer not running, dropping row", self.model.__tablename__)
+            return False
+        depth = self._queue.qsize()
+        if depth >= self.high_water:
+            self.backpressure += 1
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, depth + 1)
+        return True
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._flush(batch)
+
+    async def _flush(self, rows: list[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(self.model), rows)
+                await db.commit()
+            self.written += len(rows)
+            self.batches += 1
+            return
+        except Exception as e:
+            logger.warning("Bulk insert into {} failed ({}), retrying rows one by one", self.model.__tablename__, e)
+        for row in rows:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(insert(self.model), [row])
+                    await db.commit()
+                self.written += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error("Dropping {} row after insert failure: {}", self.model.__tablename__, e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "backpressure": self.backpressure,
+        }
+
+
+tool_call_writer = BufferedWriter(
+    models.ToolCall,
+    max_queue=get_settings().AUDIT_QUEUE_MAX_SIZE,
+    batch_size=get_settings().AUDIT_BATCH_SIZE,
+    flush_interval=get_settings().AUDIT_FLUSH_INTERVAL_SEC,
+)
+
+
+def log_tool_call(
+    organization_id: Optional[uuid.UUID],
+    call_id: Optional[uuid.UUID],
+    tool_name: str,
+    request_json: Dict[str, Any],
+    response_json: Dict[str, Any],
+    success: bool = True,
+    error: Optional[str] = None,
+) -> None:
+    """Queue a ToolCall audit row. Call after the business transaction has committed."""
+    tool_call_writer.enqueue(
+        {
+            "organization_id": organization_id,
+            "call_id": call_id,
+            "tool_name": tool_name,
+            "request_json": request_json,
+            "response_json": response_json,
+            "success": success,
+            "error": error,
+            "created_at": datetime.now(timezone.utc),
+        }
+    )
+
+
+call_event_writer = BufferedWriter(
+    models.CallEvent,
+    max_queue=get_settings().CALL_EVENT_QUEUE_MAX_SIZE,
+    batch_size=get_settings().CALL_EVENT_BATCH_SIZE,
+    flush_interval=get_settings().CALL_EVENT_FLUSH_INTERVAL_SEC,
+)
+
+_CALL_EVENT_TYPES = {
+    "call.started": CallEventType.call_started,
+    "call.start": CallEventType.call_started,
+    "call.ended": CallEventType.call_ended,
+    "call.end": CallEventType.call_ended,
+    "transcript": CallEventType.transcript,
+    "call.transcript": CallEventType.transcript,
+    "call.transcript.partial": CallEventType.transcript_partial,
+    "call.transcript.final": CallEventType.transcript_final,
+}
+
+# Events skipped by CALL_EVENT_SAMPLE_RATES, per event type
+call_events_sampled_out: Dict[str, int] = {}
+
+
+def call_event_type(event: str, payload: Dict[str, Any]) -> CallEventType:
+    event_type = _CALL_EVENT_TYPES.get(event, CallEventType.other)
+    if event_type is CallEventType.transcript and payload.get("transcriptType") == "partial":
+        return CallEventType.transcript_partial
+    return event_type
+
+
+def _shrink(value: Any, max_str: int) -> Any:
+    if isinstance(value, str) and len(value) > max_str:
+        return value[:max_str] + "…"
+    if isinstance(value, list):
+        return [_shrink(v, max_str) for v in value[:10]]
+    if isinstance(value, dict):
+        return {k: _shrink(v, max_str) for k, v in value.items()}
+    return value
+
+
+def _json_size(value: Any) -> int:
+    return len(orjson.dumps(value, default=str))
+
+
+def trim_payload(payload: Dict[str, Any], max_bytes: int) -> tuple[Optional[Dict[str, Any]], bool]:
+    """Fit a payload into max_bytes of JSON: shorten strings and lists, then keep only scalar fields.
+
+    Returns (payload, truncated); payload is None if even the scalar fields do not fit.
+    """
+    if _json_size(payload) <= max_bytes:
+        return payload, False
+    trimmed = _shrink(payload, max(32, max_bytes // 8))
+    if _json_size(trimmed) > max_bytes:
+        trimmed = {k: v for k, v in trimmed.items() if v is None or isinstance(v, (str, int, float, bool))}
+    if _json_size(trimmed) > max_bytes:
+        return None, True
+    return trimmed, True
+
+
+def log_call_event(
+    organization_id: uuid.UUID,
+    call_id: uuid.UUID,
+    event: str,
+    payload: Dict[str, Any],
+    raw: Optional[bytes] = None,
+) -> None:
+    """Queue a CallEvent row, subject to per-type sampling. Call after the call row has committed.
+
+    `payload` holds the fields the handler used; with CALL_EVENT_STORE_FULL_PAYLOAD the full
+    payload is re-read from `raw` (the event's original JSON) instead.
+    """
+    event_type = call_event_type(event, payload or {})
+    rate = get_settings().CALL_EVENT_SAMPLE_RATES.get(event_type.value, 1.0)
+    if rate < 1.0 and random.random() >= rate:
+        call_events_sampled_out[event_type.value] = call_events_sampled_out.get(event_type.value, 0) + 1
+        return
+    if raw is not None and get_settings().CALL_EVENT_STORE_FULL_PAYLOAD:
+        payload = orjson.loads(raw).get("payload") or payload
+    trimmed, truncated = trim_payload(payload or {}, get_settings().CALL_EVENT_PAYLOAD_MAX_BYTES)
+    call_event_writer.enqueue(
+        {
+            "organization_id": organization_id,
+            "call_id": call_id,
+            "event_type": event_type,
+            "event_name": event[:64] if event_type is CallEventType.other else None,
+            "payload": trimmed,
+            "payload_truncated": truncated,
+            "created_at": datetime.now(timezone.utc),
+        }
+    )
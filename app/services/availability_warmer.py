@@ -0,0 +1,138 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from time import monotonic
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.db import AsyncSessionLocal
+from app.services.bookings import AvailabilityKey, availability_cache, warm_availability
+from app import models
+
+# (Cal.com API key or None for the platform key, event type id)
+Target = tuple[Optional[str], int]
+
+
+class AvailabilityWarmer:
+    """Keeps the default availability window of agents in the availability cache.
+
+    Every `interval` seconds it loads the Cal.com credentials/event types to warm:
+    all agents with an event type (`scope="all"`) or only those with a call in the
+    last `recent_hours` (`scope="recent"`). Each target waits a random delay of up
+    to `jitter` seconds and at most `concurrency` Cal.com requests run at once.
+    Entries that are still fresh are skipped. `start`/`stop` are driven by the
+    FastAPI lifespan.
+    """
+
+    def __init__(self, scope: str, interval: float, concurrency: int, jitter: float, recent_hours: float):
+        self.scope = scope
+        self.interval = interval
+        self.concurrency = max(1, concurrency)
+        self.jitter = max(0.0, min(jitter, interval))
+        self.recent_hours = recent_hours
+        self._task: Optional[asyncio.Task] = None
+        self._targets: List[Target] = []
+        self._keys: Dict[Target, AvailabilityKey] = {}
+        self.cycles = 0
+        self.fetched = 0
+        self.skipped_fresh = 0
+        self.failed = 0
+        self.last_cycle_ms: Optional[float] = None
+        self.last_cycle_at: Optional[datetime] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="availability-warmer")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.warm_once()
+            except Exception:
+                logger.exception("Availability warm-up cycle failed")
+            await asyncio.sleep(self.interval)
+
+    async def load_targets(self) -> List[Target]:
+        agent = models.Agent
+        query = select(agent.cal_com_api_key, agent.cal_com_event_type_id).where(agent.cal_com_event_type_id.is_not(None))
+        if self.scope == "recent":
+            since = datetime.now(timezone.utc) - timedelta(hours=self.recent_hours)
+            query = query.where(
+                select(models.Call.id).where(models.Call.agent_id == agent.id, models.Call.created_at >= since).exists()
+            )
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(query.distinct())).all()
+        return [(key, int(event_type_id)) for key, event_type_id in rows]
+
+    async def warm_once(self) -> None:
+        started = monotonic()
+        targets = await self.load_targets()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._warm(target, semaphore) for target in targets))
+        self._targets = targets
+        current = set(targets)
+        self._keys = {t: key for t, key in self._keys.items() if t in current}
+        self.cycles += 1
+        self.last_cycle_ms = round((monotonic() - started) * 1000, 3)
+        self.last_cycle_at = datetime.now(timezone.utc)
+
+    async def _warm(self, target: Target, semaphore: asyncio.Semaphore) -> None:
+        if self.jitter:
+            await asyncio.sleep(random.uniform(0, self.jitter))
+        async with semaphore:
+            try:
+                key, fetched = await warm_availability(*target)
+            except Exception as e:
+                self.failed += 1
+                logger.warning("Availability warm-up failed for event type {}: {}", target[1], e)
+                return
+        self._keys[target] = key
+        if fetched:
+            self.fetched += 1
+        else:
+            self.skipped_fresh += 1
+
+    def stats(self) -> Dict[str, Any]:
+        ages = [age for age in (availability_cache.age(key) for key in self._keys.values()) if age is not None]
+        fresh = sum(1 for age in ages if age < availability_cache.ttl)
+        return {
+            "running": self.running,
+            "scope": self.scope,
+            "targets": len(self._targets),
+            "covered": len(ages),
+            "fresh": fresh,
+            "coverage": round(fresh / len(self._targets), 4) if self._targets else None,
+            "max_age_sec": round(max(ages), 3) if ages else None,
+            "cycles": self.cycles,
+            "fetched": self.fetched,
+            "skipped_fresh": self.skipped_fresh,
+            "failed": self.failed,
+            "last_cycle_ms": self.last_cycle_ms,
+            "last_cycle_at": self.last_cycle_at.isoformat() if self.last_cycle_at else None,
+        }
+
+
+availability_warmer = AvailabilityWarmer(
+    scope=get_settings().AVAILABILITY_WARMER_MODE,
+    interval=get_settings().AVAILABILITY_WARMER_INTERVAL_SEC,
+    concurrency=get_settings().AVAILABILITY_WARMER_CONCURRENCY,
+    jitter=get_settings().AVAILABILITY_WARMER_JITTER_SEC,
+    recent_hours=get_settings().AVAILABILITY_WARMER_RECENT_HOURS,
+)
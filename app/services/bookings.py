@@ -1,22 +1,144 @@
+import asyncio
 import httpx
 import re
-from datetime import datetime, timezone
-from typing import Optional
+from datetime import datetime, timedelta, timezone
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
 from fastapi import HTTPException, status
 from loguru import logger
 
 from app.config import get_settings
+from app.services.cal_com import CalComUnavailable, cal_com
+from app.services.slot_index import SlotIndex, Slots, to_epoch
+from app.utils.cache import TTLCache
+from app.utils.timing import phase
 from app.schemas.bookings import (
-    CalComAvailabilityResponse,
     CalComBookingResponse,
     CalComBookingsListResponse,
     CreateBookingRequest,
-    TimeSlot,
 )
 
 BASE_URL = get_settings().CAL_COM_BASE_URL
 
 
+class AvailabilityKey(NamedTuple):
+    credential: str
+    base_url: str
+    event_type_id: int
+    time_zone: Optional[str]
+    duration: Optional[int]
+    format: Optional[str]
+
+
+# Fetches the slots of [start, end] (epoch seconds) from Cal.com
+FetchWindow = Callable[[float, float], Awaitable[SlotIndex]]
+
+
+class AvailabilityCache:
+    """Slot indexes of Cal.com /slots windows, stale-while-revalidate.
+
+    One index per credential/event type/time zone/duration/format. A request whose
+    window lies inside the cached one is answered from it; anything else is
+    fetched, and replaces the cached index unless that one is fresh and wider.
+    An entry is fresh for `ttl` seconds. For a further `stale_ttl` seconds it is
+    still returned immediately while a single background refresh (of its own
+    window) replaces it. A successful booking drops every entry of its event type,
+    and a fetch that started before that is not stored.
+    """
+
+    def __init__(self, max_size: int, ttl: float, stale_ttl: float):
+        self.ttl = ttl
+        self._entries: TTLCache[AvailabilityKey, tuple[float, SlotIndex]] = TTLCache(
+            max_size=max_size, ttl=ttl + stale_ttl
+        )
+        self._refreshing: Dict[AvailabilityKey, asyncio.Task] = {}
+        self._generations: Dict[int, int] = {}
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.window_misses = 0  # cached, but the requested window was outside it
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.invalidations = 0
+
+    async def get(self, key: AvailabilityKey, start: float, end: float, fetch: FetchWindow) -> SlotIndex:
+        entry = self._entries.get(key)
+        if entry is None or not entry[1].covers(start, end):
+            if entry is not None:
+                self.window_misses += 1
+            return await self._fetch(key, start, end, fetch)
+        fetched_at, index = entry
+        if monotonic() - fetched_at < self.ttl:
+            self.fresh_hits += 1
+        else:
+            self.stale_hits += 1
+            if key not in self._refreshing:
+                self._refreshing[key] = asyncio.create_task(
+                    self._refresh(key, index.window_start, index.window_end, fetch), name="availability-refresh"
+                )
+        return index
+
+    def age(self, key: AvailabilityKey) -> Optional[float]:
+        """Seconds since the entry was fetched, None if not cached (does not count as a lookup)."""
+        entry = self._entries.peek(key)
+        return None if entry is None else monotonic() - entry[0]
+
+    async def warm(self, key: AvailabilityKey, start: float, end: float, fetch: FetchWindow) -> bool:
+        """Fetch and store unless a fresh entry covers the window. Returns whether Cal.com was called."""
+        entry = self._entries.peek(key)
+        if entry is not None and monotonic() - entry[0] < self.ttl and entry[1].covers(start, end):
+            return False
+        await self._fetch(key, start, end, fetch)
+        return True
+
+    async def _fetch(self, key: AvailabilityKey, start: float, end: float, fetch: FetchWindow) -> SlotIndex:
+        generation = self._generations.get(key.event_type_id, 0)
+        index = await fetch(start, end)
+        if self._generations.get(key.event_type_id, 0) == generation:
+            current = self._entries.peek(key)
+            if (
+                current is None
+                or monotonic() - current[0] >= self.ttl
+                or index.covers(current[1].window_start, current[1].window_end)
+            ):
+                self._entries.set(key, (monotonic(), index))
+        return index
+
+    async def _refresh(self, key: AvailabilityKey, start: float, end: float, fetch: FetchWindow) -> None:
+        try:
+            await self._fetch(key, start, end, fetch)
+            self.refreshes += 1
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.warning("Availability refresh failed for event type {}: {}", key.event_type_id, e)
+        finally:
+            self._refreshing.pop(key, None)
+
+    def invalidate(self, event_type_id: int) -> int:
+        """Drop cached availability of an event type (all credentials and windows)."""
+        self._generations[event_type_id] = self._generations.get(event_type_id, 0) + 1
+        self.invalidations += 1
+        return self._entries.discard_where(lambda key: key.event_type_id == event_type_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._entries.stats(),
+            "fresh_hits": self.fresh_hits,
+            "stale_hits": self.stale_hits,
+            "window_misses": self.window_misses,
+            "refreshing": len(self._refreshing),
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "invalidations": self.invalidations,
+        }
+
+
+availability_cache = AvailabilityCache(
+    max_size=get_settings().AVAILABILITY_CACHE_MAX_SIZE,
+    ttl=get_settings().AVAILABILITY_CACHE_TTL_SEC,
+    stale_ttl=get_settings().AVAILABILITY_CACHE_STALE_SEC,
+)
+
+
 def get_api_key(override: Optional[str] = None) -> str:
     if override:
         return override
@@ -66,7 +188,7 @@ def _normalize_phone_number(phone: Optional[str]) -> Optional[str]:
     logger.warning(f"Could not normalize phone number format: {phone}, returning as: {cleaned}")
     return "+" + cleaned
     
-def list_bookings(
+async def list_bookings(
     time_min: Optional[datetime] = None,
     time_max: Optional[datetime] = None,
     event_type_id: Optional[int] = None,
@@ -94,15 +216,16 @@ def list_bookings(
         params["eventTypeId"] = event_type_id  # pyright: ignore[reportArgumentType]
     
     try:
-        response = httpx.get(
-            f"{base_url}/bookings",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}",
-            },
-            params=params,
-            timeout=30.0,
-        )
+        with phase("calcom_bookings"):
+            response = await cal_com.get(
+                f"{base_url}/bookings",
+                op="bookings",
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {api_key}",
+                },
+                params=params,
+            )
         response.raise_for_status()
         data: dict = response.json()
         logger.debug("Cal.com list_bookings response: {}", data)
@@ -140,6 +263,9 @@ def list_bookings(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Cal.com API error: {e.response.status_code}"
         ) from e
+    except CalComUnavailable as e:
+        logger.warning(f"Cal.com unavailable: {e}")
+        raise HTTPException(status_code=e.status_code, detail=str(e)) from e
     except Exception as e:
         logger.error(f"Error listing Cal.com bookings for user: {e}", exc_info=True)
         raise HTTPException(
@@ -147,7 +273,7 @@ def list_bookings(
             detail="Failed to retrieve bookings"
         ) from e
 
-def create_booking(
+async def create_booking(
     user_id: str,
     booking_data: CreateBookingRequest,
     cal_com_api_key: Optional[str] = None,
@@ -200,16 +326,17 @@ def create_booking(
         payload["guests"] = guests
 
     try:
-        resp = httpx.post(
-            f"{base_url}/bookings",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "cal-api-version": "2024-08-13",
-                "Content-Type": "application/json",
-            },
-            json=payload,
-            timeout=30.0,
-        )
+        with phase("calcom_create"):
+            resp = await cal_com.post(
+                f"{base_url}/bookings",
+                op="create",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "cal-api-version": "2024-08-13",
+                    "Content-Type": "application/json",
+                },
+                json=payload,
+            )
         resp.raise_for_status()
 
         data = resp.json()
@@ -230,6 +357,7 @@ def create_booking(
         )
 
         logger.info(f"Created Cal.com booking {booking.id} for user {user_id}")
+        availability_cache.invalidate(int(event_type_id))
         return booking
 
     except httpx.HTTPStatusError as e:
@@ -243,18 +371,28 @@ def create_booking(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Cal.com API error: {e.response.status_code}",
         ) from e
+    except CalComUnavailable as e:
+        logger.warning(f"Cal.com unavailable: {e}")
+        raise HTTPException(status_code=e.status_code, detail=str(e)) from e
 
-def get_availability(
-    start: datetime,
-    end: datetime,
-    event_type_id: Optional[int] = None,
-    time_zone: Optional[str] = None,
-    duration: Optional[int] = None,
-    format: Optional[str] = None,
-    cal_com_api_key: Optional[str] = None,
-    cal_com_event_type_id: Optional[int] = None,
-    cal_com_base_url: Optional[str] = None,
-) -> CalComAvailabilityResponse:
+
+def default_availability_window(now: Optional[datetime] = None) -> tuple[datetime, datetime]:
+    """Window used when no start/end is given: today 00:00 UTC through 4 weeks from today, 23:59:59 UTC."""
+    now = now or datetime.now(timezone.utc)
+    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    end = (now + timedelta(weeks=4)).replace(hour=23, minute=59, second=59, microsecond=999999)
+    return start, end
+
+
+def _availability_request(
+    event_type_id: Optional[int],
+    time_zone: Optional[str],
+    duration: Optional[int],
+    format: Optional[str],
+    cal_com_api_key: Optional[str],
+    cal_com_event_type_id: Optional[int],
+    cal_com_base_url: Optional[str],
+) -> tuple[AvailabilityKey, FetchWindow]:
     api_key = get_api_key(cal_com_api_key)
     base_url = cal_com_base_url or BASE_URL
     if event_type_id is None:
@@ -266,12 +404,8 @@ def get_availability(
         )
     event_type_id = int(event_type_id)
     
-    # Build query parameters
-    params = {
-        "eventTypeId": event_type_id,
-        "start": _to_utc_z(start),
-        "end": _to_utc_z(end),
-    }
+    # Build query parameters (start/end are added per fetched window)
+    params: dict = {"eventTypeId": event_type_id}
     
     if time_zone:
         params["timeZone"] = time_zone
@@ -281,42 +415,75 @@ def get_availability(
     
     if format:
         params["format"] = format
-    
+
+    key = AvailabilityKey(api_key, base_url, event_type_id, time_zone, duration, format)
+    return key, lambda start, end: _fetch_availability(api_key, base_url, params, start, end)
+
+
+async def get_availability(
+    start: datetime,
+    end: datetime,
+    event_type_id: Optional[int] = None,
+    time_zone: Optional[str] = None,
+    duration: Optional[int] = None,
+    format: Optional[str] = None,
+    cal_com_api_key: Optional[str] = None,
+    cal_com_event_type_id: Optional[int] = None,
+    cal_com_base_url: Optional[str] = None,
+) -> Slots:
+    """Available slots in [start, end] in the CalComAvailabilityResponse.slots shape."""
+    key, fetch = _availability_request(
+        event_type_id, time_zone, duration, format, cal_com_api_key, cal_com_event_type_id, cal_com_base_url
+    )
+    start_ts, end_ts = to_epoch(start), to_epoch(end)
+    if get_settings().AVAILABILITY_CACHE_ENABLED:
+        index = await availability_cache.get(key, start_ts, end_ts, fetch)
+    else:
+        index = await fetch(start_ts, end_ts)
+    with phase("slot_lookup"):
+        return index.slots(start_ts, end_ts)
+
+
+async def warm_availability(
+    cal_com_api_key: Optional[str],
+    cal_com_event_type_id: Optional[int],
+    now: Optional[datetime] = None,
+) -> tuple[AvailabilityKey, bool]:
+    """Pre-fetch the default window into the availability cache. Returns its key and whether Cal.com was called."""
+    start, end = default_availability_window(now)
+    key, fetch = _availability_request(None, None, None, None, cal_com_api_key, cal_com_event_type_id, None)
+    return key, await availability_cache.warm(key, to_epoch(start), to_epoch(end), fetch)
+
+
+async def _fetch_availability(
+    api_key: str,
+    base_url: str,
+    params: dict,
+    start_ts: float,
+    end_ts: float,
+) -> SlotIndex:
+    start = datetime.fromtimestamp(start_ts, tz=timezone.utc)
+    end = datetime.fromtimestamp(end_ts, tz=timezone.utc)
     try:
-        response = httpx.get(
-            f"{base_url}/slots",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}",
-                "cal-api-version": "2024-09-04",
-            },
-            params=params,
-            timeout=30.0,
-        )
+        with phase("calcom_slots"):
+            response = await cal_com.get(
+                f"{base_url}/slots",
+                op="slots",
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {api_key}",
+                    "cal-api-version": "2024-09-04",
+                },
+                params={**params, "start": _to_utc_z(start), "end": _to_utc_z(end)},
+            )
         response.raise_for_status()
         data: dict = response.json()
         
-        # Parse the response data
-        slots_data = data.get("data", {})
-        
-        # Convert to our schema format
-        slots: dict[str, list[TimeSlot]] = {}
-        for date_str, slot_list in slots_data.items():
-            slots[date_str] = []
-            for slot_item in slot_list:
-                if isinstance(slot_item, dict):
-                    slot = TimeSlot(
-                        start=slot_item.get("start", ""),
-                        end=slot_item.get("end"),
-                    )
-                    slots[date_str].append(slot)
-                elif isinstance(slot_item, str):
-                    # If format is 'time', slots might be just strings
-                    slot = TimeSlot(start=slot_item, end=None)
-                    slots[date_str].append(slot)
+        # Index the per-date slots once; requests are answered from the index
+        index = SlotIndex(data.get("data", {}), start_ts, end_ts, params.get("timeZone"))
         
-        logger.info(f"Retrieved availability for user from {start} to {end}")
-        return CalComAvailabilityResponse(slots=slots)
+        logger.info(f"Retrieved {len(index)} availability slots for user from {start} to {end}")
+        return index
         
     except httpx.HTTPStatusError as e:
         logger.error(f"Cal.com API error: {e.response.status_code} - {e.response.text}")
@@ -329,6 +496,9 @@ def get_availability(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail=f"Cal.com API error: {e.response.status_code}"
         ) from e
+    except CalComUnavailable as e:
+        logger.warning(f"Cal.com unavailable: {e}")
+        raise HTTPException(status_code=e.status_code, detail=str(e)) from e
     except Exception as e:
         logger.error(f"Error getting Cal.com availability for user: {e}", exc_info=True)
         raise HTTPException(
@@ -0,0 +1,330 @@
+import asyncio
+import hashlib
+import random
+from collections import Counter
+from dataclasses import dataclass
+from importlib.util import find_spec
+from time import monotonic
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+
+import httpx
+from loguru import logger
+
+from app.config import get_settings
+from app.utils.cache import TTLCache
+
+# Responses worth another attempt for idempotent requests
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+Send = Callable[[], Awaitable[httpx.Response]]
+
+
+class CalComUnavailable(Exception):
+    """Cal.com was not asked (circuit open) or did not answer within the operation's deadline."""
+
+    status_code = 503
+
+
+class CalComCircuitOpen(CalComUnavailable):
+    def __init__(self, op: str):
+        super().__init__(f"Cal.com is temporarily unavailable ({op}); try again shortly")
+
+
+class CalComDeadlineExceeded(CalComUnavailable):
+    status_code = 504
+
+    def __init__(self, op: str, deadline: float):
+        super().__init__(f"Cal.com did not respond within {deadline:g}s ({op})")
+
+
+@dataclass(frozen=True, slots=True)
+class CallPolicy:
+    deadline: float  # whole operation, retries and hedges included
+    retries: int = 0
+    hedge_after: float = 0.0  # send a second identical request if the first is slower than this; 0 = off
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one Cal.com credential.
+
+    Opens after `threshold` failures in a row (transport errors, deadlines, 5xx).
+    While open, requests fail fast; after `reset_after` seconds a single trial
+    request is let through and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self._trial or monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        if self.threshold <= 0 or self.opened_at is None:
+            return True
+        if self._trial or monotonic() - self.opened_at < self.reset_after:
+            return False
+        self._trial = True
+        return True
+
+    def record(self, ok: bool) -> None:
+        self._trial = False
+        if ok:
+            self.failures = 0
+            self.opened_at = None
+            return
+        self.failures += 1
+        if self.threshold > 0 and (self.opened_at is not None or self.failures >= self.threshold):
+            if self.opened_at is None:
+                logger.warning("Cal.com circuit opened after {} consecutive failures", self.failures)
+            self.opened_at = monotonic()
+
+    def release(self) -> None:
+        """The trial request was abandoned without an outcome."""
+        self._trial = False
+
+
+class CalComClient:
+    """One keep-alive pooled httpx.AsyncClient shared by every Cal.com request.
+
+    Connections (and TLS sessions) are reused across requests instead of being
+    opened per call. HTTP/2 is used when requested and the optional `h2` package
+    is installed. `start`/`stop` are driven by the FastAPI lifespan; outside it
+    (scripts) the client is created on first use.
+
+    `get` is single-flight: concurrent GETs with the same URL, credential, API
+    version and params share one upstream request and all receive its response.
+
+    Every request runs under its operation's CallPolicy: a deadline for the whole
+    operation, jittered exponential-backoff retries (GETs only) and an optional
+    hedged second request. A per-credential CircuitBreaker fails fast with
+    CalComCircuitOpen while Cal.com keeps failing; breakers are kept in a bounded
+    cache keyed by a hash of the credential and expire once idle.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        connect_timeout: float,
+        timeout: float,
+        http2: bool,
+        coalesce: bool = True,
+        policies: Optional[Dict[str, CallPolicy]] = None,
+        retry_backoff: float = 0.2,
+        breaker_failures: int = 5,
+        breaker_reset_after: float = 30.0,
+        breaker_max_size: int = 1024,
+        breaker_idle: float = 3600.0,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2 and find_spec("h2") is not None
+        if http2 and not self.http2:
+            logger.info("CAL_COM_HTTP2 is set but the h2 package is not installed; using HTTP/1.1")
+        self.coalesce = coalesce
+        self.policies = policies or {}
+        self.retry_backoff = retry_backoff
+        self.breaker_failures = breaker_failures
+        self.breaker_reset_after = breaker_reset_after
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._breakers: TTLCache[str, CircuitBreaker] = TTLCache(max_size=breaker_max_size, ttl=breaker_idle)
+        self.opened = 0
+        self.upstream_gets = 0
+        self.coalesced_gets = 0
+        self.requests: Counter[str] = Counter()
+        self.retries: Counter[str] = Counter()
+        self.hedges: Counter[str] = Counter()
+        self.hedge_wins: Counter[str] = Counter()
+        self.deadline_exceeded: Counter[str] = Counter()
+        self.short_circuited: Counter[str] = Counter()
+
+    def start(self) -> None:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+            self.opened += 1
+
+    async def stop(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        self.start()
+        assert self._client is not None
+        return self._client
+
+    async def get(
+        self, url: str, *, headers: Mapping[str, str], params: Mapping[str, Any], op: str
+    ) -> httpx.Response:
+        def send() -> Awaitable[httpx.Response]:
+            return self.client.get(url, headers=headers, params=params)
+
+        credential = headers.get("Authorization", "")
+        if not self.coalesce:
+            self.upstream_gets += 1
+            return await self._execute(op, credential, send)
+        key = (
+            url,
+            credential,
+            headers.get("cal-api-version"),
+            tuple(sorted((k, str(v)) for k, v in params.items())),
+        )
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            self.upstream_gets += 1
+            inflight = asyncio.ensure_future(self._execute(op, credential, send))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda f: self._settle(key, f))
+        else:
+            self.coalesced_gets += 1
+        # Shielded so one caller giving up does not cancel the request the others wait on
+        return await asyncio.shield(inflight)
+
+    async def post(self, url: str, *, headers: Mapping[str, str], json: Any, op: str) -> httpx.Response:
+        """Not coalesced, and never retried or hedged regardless of policy (not idempotent)."""
+        return await self._execute(
+            op, headers.get("Authorization", ""), lambda: self.client.post(url, headers=headers, json=json), idempotent=False
+        )
+
+    def _settle(self, key: tuple, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if not future.cancelled():
+            future.exception()  # mark retrieved even if every waiter was cancelled
+
+    def _breaker(self, credential: str) -> CircuitBreaker:
+        # Keyed by a digest so bearer tokens are not kept beyond the requests using them
+        key = hashlib.sha256(credential.encode()).hexdigest()
+        breaker = self._breakers.get(key) or CircuitBreaker(self.breaker_failures, self.breaker_reset_after)
+        self._breakers.set(key, breaker)  # re-stored on every use: the TTL is an idle timeout
+        return breaker
+
+    async def _execute(self, op: str, credential: str, send: Send, idempotent: bool = True) -> httpx.Response:
+        policy = self.policies.get(op) or CallPolicy(deadline=self.timeout.read or 30.0)
+        breaker = self._breaker(credential)
+        if not breaker.allow():
+            self.short_circuited[op] += 1
+            raise CalComCircuitOpen(op)
+        self.requests[op] += 1
+        try:
+            async with asyncio.timeout(policy.deadline):
+                if idempotent:
+                    response = await self._attempts(op, policy, send)
+                else:
+                    response = await send()
+        except TimeoutError as e:
+            breaker.record(False)
+            self.deadline_exceeded[op] += 1
+            raise CalComDeadlineExceeded(op, policy.deadline) from e
+        except httpx.TransportError:
+            breaker.record(False)
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record(response.status_code < 500)
+        return response
+
+    async def _attempts(self, op: str, policy: CallPolicy, send: Send) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await (self._hedged(op, policy.hedge_after, send) if policy.hedge_after > 0 else send())
+                if response.status_code not in RETRY_STATUSES or attempt >= policy.retries:
+                    return response
+            except httpx.TransportError:
+                if attempt >= policy.retries:
+                    raise
+            attempt += 1
+            self.retries[op] += 1
+            # Full jitter: spreads retries of many callers instead of synchronizing them
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2 ** (attempt - 1)))
+
+    async def _hedged(self, op: str, hedge_after: float, send: Send) -> httpx.Response:
+        first = asyncio.ensure_future(send())
+        done, _ = await asyncio.wait({first}, timeout=hedge_after)
+        if done:
+            return first.result()
+        self.hedges[op] += 1
+        second = asyncio.ensure_future(send())
+        pending = {first, second}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winners = [t for t in done if t.exception() is None and t.result().status_code < 500]
+                if winners:
+                    if winners[0] is second:
+                        self.hedge_wins[op] += 1
+                    return winners[0].result()
+                if not pending:
+                    # Both failed: surface the later outcome (retried by the caller if allowed)
+                    return done.pop().result()
+        finally:
+            for task in (first, second):
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        gets = self.upstream_gets + self.coalesced_gets
+        states = Counter(breaker.state for breaker in self._breakers.values())
+        return {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "clients_opened": self.opened,
+            "inflight_gets": len(self._inflight),
+            "upstream_gets": self.upstream_gets,
+            "coalesced_gets": self.coalesced_gets,
+            "coalesce_ratio": round(self.coalesced_gets / gets, 4) if gets else None,
+            "requests": dict(self.requests),
+            "retries": dict(self.retries),
+            "hedges": dict(self.hedges),
+            "hedge_wins": dict(self.hedge_wins),
+            "deadline_exceeded": dict(self.deadline_exceeded),
+            "short_circuited": dict(self.short_circuited),
+            "circuits": {"tracked": sum(states.values()), "open": states["open"], "half_open": states["half_open"]},
+        }
+
+
+cal_com = CalComClient(
+    max_connections=get_settings().CAL_COM_MAX_CONNECTIONS,
+    max_keepalive_connections=get_settings().CAL_COM_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=get_settings().CAL_COM_KEEPALIVE_EXPIRY_SEC,
+    connect_timeout=get_settings().CAL_COM_CONNECT_TIMEOUT_SEC,
+    timeout=get_settings().CAL_COM_TIMEOUT_SEC,
+    http2=get_settings().CAL_COM_HTTP2,
+    coalesce=get_settings().CAL_COM_COALESCE_GETS,
+    policies={
+        "slots": CallPolicy(
+            deadline=get_settings().CAL_COM_SLOTS_DEADLINE_SEC,
+            retries=get_settings().CAL_COM_GET_RETRIES,
+            hedge_after=get_settings().CAL_COM_SLOTS_HEDGE_AFTER_SEC,
+        ),
+        "bookings": CallPolicy(
+            deadline=get_settings().CAL_COM_BOOKINGS_DEADLINE_SEC,
+            retries=get_settings().CAL_COM_GET_RETRIES,
+        ),
+        "create": CallPolicy(deadline=get_settings().CAL_COM_CREATE_DEADLINE_SEC),
+    },
+    retry_backoff=get_settings().CAL_COM_RETRY_BACKOFF_SEC,
+    breaker_failures=get_settings().CAL_COM_BREAKER_FAILURES,
+    breaker_reset_after=get_settings().CAL_COM_BREAKER_RESET_SEC,
+    breaker_max_size=get_settings().CAL_COM_BREAKER_MAX_SIZE,
+    breaker_idle=get_settings().CAL_COM_BREAKER_IDLE_SEC,
+)
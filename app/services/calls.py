@@ -0,0 +1,131 @@
+import uuid
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.utils.cache import TTLCache
+from app.utils.timing import phase
+from app import models
+
+# xmax is 0 only for a freshly inserted row version, so it tells an INSERT from an ON CONFLICT UPDATE
+_CREATED = literal_column("xmax = 0").label("created")
+
+
+async def get_or_create_call(
+    db: AsyncSession,
+    vapi_call_id: str,
+    organization_id: uuid.UUID,
+    agent_id: Optional[uuid.UUID],
+) -> tuple[models.Call, bool]:
+    """Upsert the call for (organization_id, vapi_call_id) in one round trip. Returns (call, created)."""
+    insert_stmt = pg_insert(models.Call).values(
+        vapi_call_id=vapi_call_id,
+        organization_id=organization_id,
+        agent_id=agent_id,
+    )
+    stmt = insert_stmt.on_conflict_do_update(
+        constraint="uq_calls_org_vapi_call_id",
+        set_={"agent_id": func.coalesce(models.Call.agent_id, insert_stmt.excluded.agent_id)},
+    ).returning(models.Call, _CREATED)
+    with phase("call_upsert"):
+        call, created = (await db.execute(stmt, execution_options={"populate_existing": True})).one()
+    return call, created
+
+
+async def upsert_lead_row(
+    db: AsyncSession,
+    organization_id: uuid.UUID,
+    phone: str,
+    fields: Dict[str, Any],
+) -> tuple[uuid.UUID, bool]:
+    """Insert or update the lead for (organization_id, phone) in one round trip. Returns (lead_id, created).
+
+    Only keys present in `fields` are overwritten on an existing lead.
+    """
+    insert_stmt = pg_insert(models.Lead).values(organization_id=organization_id, phone=phone, **fields)
+    set_: Dict[str, Any] = {k: insert_stmt.excluded[k] for k in fields}
+    set_["updated_at"] = func.now()
+    stmt = insert_stmt.on_conflict_do_update(constraint="uq_leads_org_phone", set_=set_).returning(
+        models.Lead.id, _CREATED
+    )
+    with phase("lead_upsert"):
+        lead_id, created = (await db.execute(stmt)).one()
+    return lead_id, created
+
+
+# Per-call context cache
+# -------------------------
+@dataclass(frozen=True, slots=True)
+class CallContext:
+    """What the tool handlers need to know about a live call, reused across its tool invocations."""
+    call_id: uuid.UUID
+    lead_id: Optional[uuid.UUID] = None  # lead linked to the call
+    lead_ids: frozenset[uuid.UUID] = field(default_factory=frozenset)  # leads known to belong to the org
+
+
+# (organization_id, vapi_call_id) -> CallContext; the TTL is an idle timeout since every tool call re-stores it
+call_contexts: TTLCache[tuple[uuid.UUID, str], CallContext] = TTLCache(
+    max_size=get_settings().CALL_CONTEXT_MAX_SIZE,
+    ttl=get_settings().CALL_CONTEXT_IDLE_SEC,
+)
+
+
+async def resolve_call_context(
+    db: AsyncSession,
+    vapi_call_id: str,
+    organization_id: uuid.UUID,
+    agent_id: Optional[uuid.UUID],
+) -> CallContext:
+    ctx = call_contexts.get((organization_id, vapi_call_id))
+    if ctx is not None:
+        return ctx
+    call, _ = await get_or_create_call(db, vapi_call_id, organization_id, agent_id)
+    lead_ids = frozenset([call.lead_id]) if call.lead_id else frozenset()
+    return CallContext(call_id=call.id, lead_id=call.lead_id, lead_ids=lead_ids)
+
+
+async def attach_lead(
+    db: AsyncSession,
+    ctx: CallContext,
+    organization_id: uuid.UUID,
+    lead_id: uuid.UUID,
+    validate: bool = True,
+) -> CallContext:
+    """Check the lead belongs to the org (unless already known) and link it to the call if it has none.
+
+    Raises 404 if the lead is not in the organization.
+    """
+    if validate and lead_id not in ctx.lead_ids:
+        with phase("lead_lookup"):
+            found = await db.scalar(
+                select(models.Lead.id).where(models.Lead.id == lead_id, models.Lead.organization_id == organization_id)
+            )
+        if not found:
+            raise HTTPException(status_code=404, detail="Lead not found")
+    linked = ctx.lead_id
+    if linked is None:
+        with phase("lead_link"):
+            linked = await db.scalar(
+                update(models.Call)
+                .where(models.Call.id == ctx.call_id, models.Call.lead_id.is_(None))
+                .values(lead_id=lead_id)
+                .returning(models.Call.lead_id)
+            )
+            if linked is None:
+                # Another request linked a lead first: keep the one stored on the call
+                linked = await db.scalar(select(models.Call.lead_id).where(models.Call.id == ctx.call_id))
+    return replace(ctx, lead_id=linked, lead_ids=ctx.lead_ids | {lead_id})
+
+
+def remember_call_context(organization_id: uuid.UUID, vapi_call_id: str, ctx: CallContext) -> None:
+    """Store the context once the transaction that produced it has committed."""
+    call_contexts.set((organization_id, vapi_call_id), ctx)
+
+
+def forget_call_context(organization_id: uuid.UUID, vapi_call_id: str) -> None:
+    call_contexts.pop((organization_id, vapi_call_id))
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from pydantic import BaseModel
+
+from app.config import get_settings
+from app.utils.cache import MISSING, TTLCache
+
+
+def replay_key(
+    agent_id: uuid.UUID,
+    tool_name: str,
+    payload: BaseModel,
+    idempotency_key: Optional[str] = None,
+) -> Hashable:
+    """Explicit Idempotency-Key if sent, else (agent, call_id, tool, payload hash)."""
+    if idempotency_key:
+        return (agent_id, tool_name, "key", idempotency_key)
+    body = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+    return (agent_id, getattr(payload, "call_id", None), tool_name, digest)
+
+
+class ReplayCache:
+    """Runs each tool request once per key and replays the stored response for retries.
+
+    Only successful responses are stored. A duplicate that arrives while the first
+    execution is still running waits for it and gets the same result (or error).
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._done: TTLCache[Hashable, Dict[str, Any]] = TTLCache(max_size=max_size, ttl=ttl)
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.replayed = 0
+        self.joined = 0
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        while True:
+            stored = self._done.get(key, MISSING)
+            if stored is not MISSING:
+                self.replayed += 1
+                return stored
+            fut = self._inflight.get(key)
+            if fut is None:
+                break
+            self.joined += 1
+            try:
+                return await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not fut.cancelled() or (task is not None and task.cancelling()):
+                    raise
+                # the first execution was cancelled (client went away); try again ourselves
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        self.executed += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved; waiters (if any) re-raise it
+            raise
+        else:
+            self._done.set(key, result)
+            fut.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "joined": self.joined,
+            "in_flight": len(self._inflight),
+            "stored": self._done.stats(),
+        }
+
+
+tool_replays = ReplayCache(
+    max_size=get_settings().TOOL_REPLAY_MAX_SIZE,
+    ttl=get_settings().TOOL_REPLAY_TTL_SEC,
+)
@@ -0,0 +1,127 @@
+"""Monthly partition maintenance for tool_calls (range-partitioned on created_at).
+
+Run from cron/a scheduler, e.g. daily:
+    python -m app.services.partitions              # create upcoming months, drop expired ones if a retention is set
+    python -m app.services.partitions --detach-only
+"""
+import argparse
+import re
+from datetime import date, datetime, timezone
+from typing import List
+
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.config import get_settings
+from app.db import engine
+
+PARENT = "tool_calls"
+_MONTHLY = re.compile(rf"^{PARENT}_(\d{{4}})(\d{{2}})$")
+
+
+def _add_months(d: date, months: int) -> date:
+    y, m = divmod(d.year * 12 + d.month - 1 + months, 12)
+    return date(y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_{month:%Y%m}"
+
+
+def ensure_partitions(conn: Connection, ahead: int, today: date | None = None) -> List[str]:
+    """Create partitions for the current month and `ahead` months after it. Returns the names created."""
+    first = (today or datetime.now(timezone.utc).date()).replace(day=1)
+    existing = set(list_partitions(conn))
+    created = []
+    for i in range(ahead + 1):
+        month = _add_months(first, i)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        conn.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT} '
+                f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{_add_months(month, 1).isoformat()} 00:00:00+00')"
+            )
+        )
+        created.append(name)
+    return created
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent ORDER BY c.relname"
+        ),
+        {"parent": PARENT},
+    )
+    return [r[0] for r in rows]
+
+
+def expired_partitions(names: List[str], retention_months: int, today: date | None = None) -> List[str]:
+    """Monthly partitions whose whole month is older than the retention window (none if retention_months <= 0)."""
+    if retention_months <= 0:
+        return []
+    cutoff = _add_months((today or datetime.now(timezone.utc).date()).replace(day=1), -retention_months)
+    expired = []
+    for name in names:
+        match = _MONTHLY.match(name)
+        if match and _add_months(date(int(match[1]), int(match[2]), 1), 1) <= cutoff:
+            expired.append(name)
+    return expired
+
+
+def expire_partitions(retention_months: int, drop: bool = True, concurrently: bool = True) -> List[str]:
+    """Detach (and by default drop) expired partitions. Runs in autocommit: DETACH CONCURRENTLY needs it.
+
+    PostgreSQL refuses DETACH ... CONCURRENTLY while the parent has a default
+    partition, so with tool_calls_default present a plain DETACH is used (it takes
+    a short ACCESS EXCLUSIVE lock on tool_calls).
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        partitions = list_partitions(conn)
+        if concurrently and f"{PARENT}_default" in partitions:
+            logger.info("{}_default exists; detaching without CONCURRENTLY", PARENT)
+            concurrently = False
+        expired = expired_partitions(partitions, retention_months)
+        for name in expired:
+            conn.execute(text(f'ALTER TABLE {PARENT} DETACH PARTITION "{name}"{" CONCURRENTLY" if concurrently else ""}'))
+            if drop:
+                conn.execute(text(f'DROP TABLE "{name}"'))
+            logger.info("{} partition {}", "Dropped" if drop else "Detached", name)
+    return expired
+
+
+def run_maintenance(
+    ahead: int | None = None,
+    retention_months: int | None = None,
+    drop: bool = True,
+    concurrently: bool = True,
+) -> None:
+    settings = get_settings()
+    ahead = settings.TOOL_CALLS_PARTITIONS_AHEAD if ahead is None else ahead
+    retention_months = settings.TOOL_CALLS_RETENTION_MONTHS if retention_months is None else retention_months
+    with engine.begin() as conn:
+        created = ensure_partitions(conn, ahead)
+        stray = conn.execute(text(f"SELECT count(*) FROM {PARENT}_default")).scalar_one()
+    for name in created:
+        logger.info("Created partition {}", name)
+    if stray:
+        logger.warning("{} rows in {}_default: pre-create partitions for their months", stray, PARENT)
+    if retention_months > 0:
+        expire_partitions(retention_months, drop=drop, concurrently=concurrently)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create upcoming and expire old tool_calls partitions.")
+    parser.add_argument("--ahead", type=int, default=None, help="Months to create ahead (default TOOL_CALLS_PARTITIONS_AHEAD).")
+    parser.add_argument(
+        "--retention-months", type=int, default=None, help="Months to keep; 0 keeps all (default TOOL_CALLS_RETENTION_MONTHS, 0)."
+    )
+    parser.add_argument("--detach-only", action="store_true", help="Detach expired partitions but keep them as tables.")
+    parser.add_argument("--no-concurrently", action="store_true", help="Plain DETACH (PostgreSQL < 14); always used while tool_calls_default exists.")
+    args = parser.parse_args()
+    run_maintenance(args.ahead, args.retention_months, drop=not args.detach_only, concurrently=not args.no_concurrently)
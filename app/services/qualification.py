@@ -0,0 +1,238 @@
+import enum
+import re
+import sys
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+from loguru import logger
+from pydantic import ValidationError
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.schemas.agents import QualificationRule, QualificationRules
+from app.utils.cache import TTLCache
+from app.utils.timing import phase
+from app import models
+
+FIT_CHECK_FIELDS = ("response_speed", "weekly_enquiries", "capacity_next_weeks", "primary_intent", "has_followup_system")
+
+# Scoring used before rules were configurable: 50, +10 for a diagnosis tag, +10 for a summary, book at 55
+DEFAULT_RULES = QualificationRules(
+    rules=[
+        QualificationRule(field="diagnosis_tag", op="present", points=10),
+        QualificationRule(field="one_sentence_summary", op="present", points=10),
+    ]
+)
+
+RESCORE_CHUNK_SIZE = 50_000
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def _plain(value: Any) -> Any:
+    return value.value if isinstance(value, enum.Enum) else value
+
+
+def _as_number(value: Any) -> Optional[float]:
+    """weekly_enquiries is free text ("20", "10-15 a week"); use its first number."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    m = _NUMBER.search(str(value))
+    return float(m.group()) if m else None
+
+
+def _predicate(rule: QualificationRule) -> Callable[[Any], bool]:
+    value = rule.value
+    if rule.op == "present":
+        return lambda v: v is not None and v != ""
+    if rule.op == "in":
+        allowed = frozenset(value or ())
+        return lambda v: v in allowed
+    if rule.op == "gte":
+        bound = float(value)
+        return lambda v: (n := _as_number(v)) is not None and n >= bound
+    if rule.op == "lte":
+        bound = float(value)
+        return lambda v: (n := _as_number(v)) is not None and n <= bound
+    return lambda v: v == value
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRules:
+    """An agent's rule set turned into (field, predicate, points) checks."""
+    rules: QualificationRules
+    checks: tuple[tuple[str, Callable[[Any], bool], int], ...]
+    needs_fit_check: bool
+
+    def action(self, score: int) -> str:
+        if score >= self.rules.book_threshold:
+            return "book"
+        if self.rules.not_fit_below is not None and score < self.rules.not_fit_below:
+            return "not-fit"
+        return "park"
+
+    def score(self, features: Dict[str, Any]) -> tuple[int, str]:
+        score = self.rules.base_score
+        for field, check, points in self.checks:
+            if check(_plain(features.get(field))):
+                score += points
+        return score, self.action(score)
+
+    def score_many(self, columns: Dict[str, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+        """Vectorized score(): `columns` maps each field to an object array of plain values."""
+        n = len(next(iter(columns.values())))
+        scores = np.full(n, self.rules.base_score, dtype=np.int64)
+        numeric: Dict[str, np.ndarray] = {}
+        for rule in self.rules.rules:
+            col = columns[rule.field]
+            if rule.op == "present":
+                mask = np.not_equal(col, None) & np.not_equal(col, "")
+            elif rule.op == "in":
+                mask = np.isin(col, np.array(list(rule.value or ()), dtype=object))
+            elif rule.op in ("gte", "lte"):
+                if rule.field not in numeric:
+                    numeric[rule.field] = np.array([_as_number(v) for v in col], dtype=float)
+                nums = numeric[rule.field]
+                with np.errstate(invalid="ignore"):
+                    mask = nums >= float(rule.value) if rule.op == "gte" else nums <= float(rule.value)
+            else:
+                mask = np.equal(col, rule.value)
+            scores += rule.points * mask.astype(np.int64)
+        actions = np.where(scores >= self.rules.book_threshold, "book", "park").astype(object)
+        if self.rules.not_fit_below is not None:
+            actions[scores < self.rules.not_fit_below] = "not-fit"
+        return scores, actions
+
+
+def compile_rules(raw: Optional[Dict[str, Any]]) -> CompiledRules:
+    rules = DEFAULT_RULES
+    if raw:
+        try:
+            rules = QualificationRules.model_validate(raw)
+        except ValidationError as e:
+            logger.warning("Invalid qualification rules, using defaults: {}", e)
+    checks = tuple((r.field, _predicate(r), r.points) for r in rules.rules)
+    needs_fit_check = any(r.field in FIT_CHECK_FIELDS for r in rules.rules)
+    return CompiledRules(rules=rules, checks=checks, needs_fit_check=needs_fit_check)
+
+
+# (agent_id, agent.updated_at) -> CompiledRules; a rules change bumps updated_at, so stale entries just age out
+_compiled_rules: TTLCache[tuple[uuid.UUID, Optional[datetime]], CompiledRules] = TTLCache(max_size=1024, ttl=3600)
+
+
+async def get_compiled_rules(db: AsyncSession, agent_id: uuid.UUID, version: Optional[datetime]) -> CompiledRules:
+    key = (agent_id, version)
+    compiled = _compiled_rules.get(key)
+    if compiled is None:
+        with phase("rules_load"):
+            raw = await db.scalar(select(models.Agent.qualification_rules).where(models.Agent.id == agent_id))
+        compiled = compile_rules(raw)
+        _compiled_rules.set(key, compiled)
+    return compiled
+
+
+async def latest_fit_check_features(db: AsyncSession, call_id: uuid.UUID) -> Dict[str, Any]:
+    with phase("fit_check_lookup"):
+        row = (
+            await db.execute(
+                select(*(getattr(models.FitCheck, f) for f in FIT_CHECK_FIELDS))
+                .where(models.FitCheck.call_id == call_id)
+                .order_by(models.FitCheck.created_at.desc())
+                .limit(1)
+            )
+        ).first()
+    return dict(row._mapping) if row else {}
+
+
+# Bulk rescoring
+# -------------------------
+def rescore_organization(db: Session, organization_id: uuid.UUID, agent_id: Optional[uuid.UUID] = None) -> int:
+    """Recompute Qualification.score/recommended_action for an org's history (optionally one agent's calls).
+
+    Each qualification is scored with its call's agent rules against the call's latest FitCheck.
+    Returns the number of qualifications updated.
+    """
+    fit = models.FitCheck
+    latest_fit = (
+        select(fit.call_id, *(getattr(fit, f) for f in FIT_CHECK_FIELDS))
+        .where(fit.organization_id == organization_id)
+        .distinct(fit.call_id)
+        .order_by(fit.call_id, fit.created_at.desc())
+        .subquery()
+    )
+    stmt = (
+        select(
+            models.Qualification.id,
+            models.Call.agent_id,
+            models.Qualification.diagnosis_tag,
+            models.Qualification.one_sentence_summary,
+            *(latest_fit.c[f] for f in FIT_CHECK_FIELDS),
+        )
+        .join(models.Call, models.Call.id == models.Qualification.call_id)
+        .outerjoin(latest_fit, latest_fit.c.call_id == models.Qualification.call_id)
+        .where(models.Qualification.organization_id == organization_id)
+    )
+    if agent_id is not None:
+        stmt = stmt.where(models.Call.agent_id == agent_id)
+
+    agent_rules = dict(
+        db.execute(
+            select(models.Agent.id, models.Agent.qualification_rules).where(
+                models.Agent.organization_id == organization_id
+            )
+        ).all()
+    )
+    compiled = {aid: compile_rules(raw) for aid, raw in agent_rules.items()}
+    default = compile_rules(None)
+
+    fields = ("diagnosis_tag", "one_sentence_summary") + FIT_CHECK_FIELDS
+    updated = 0
+    for chunk in db.execute(stmt.execution_options(yield_per=RESCORE_CHUNK_SIZE)).partitions():
+        ids = [row[0] for row in chunk]
+        agents = np.array([row[1] for row in chunk], dtype=object)
+        columns = {f: np.array([_plain(row[i + 2]) for row in chunk], dtype=object) for i, f in enumerate(fields)}
+        scores = np.zeros(len(chunk), dtype=np.int64)
+        actions = np.empty(len(chunk), dtype=object)
+        for aid in set(agents.tolist()):
+            mask = agents == aid
+            s, a = compiled.get(aid, default).score_many({f: col[mask] for f, col in columns.items()})
+            scores[mask] = s
+            actions[mask] = a
+        db.execute(
+            update(models.Qualification),
+            [
+                {"id": qid, "score": int(score), "recommended_action": action}
+                for qid, score, action in zip(ids, scores.tolist(), actions.tolist())
+            ],
+        )
+        updated += len(ids)
+    db.commit()
+    logger.info("Rescored {} qualifications for organization {}", updated, organization_id)
+    return updated
+
+
+def rescore_organization_job(organization_id: uuid.UUID, agent_id: Optional[uuid.UUID] = None) -> None:
+    """Background-task entry point: runs rescore_organization on its own session."""
+    db = SessionLocal()
+    try:
+        rescore_organization(db, organization_id, agent_id)
+    except Exception as e:
+        logger.error("Rescoring organization {} failed: {}", organization_id, e, exc_info=True)
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # python -m app.services.qualification <organization_id> [agent_id]
+    rescore_organization_job(
+        uuid.UUID(sys.argv[1]),
+        uuid.UUID(sys.argv[2]) if len(sys.argv) > 2 else None,
+    )
@@ -0,0 +1,214 @@
+import hashlib
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import orjson
+from sqlalchemy import exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.config import get_settings
+from app.schemas.webhooks import WebhookEvent
+from app.services.transcripts import TRANSCRIPT_EVENTS, parse_event_timestamp
+from app.utils.cache import TTLCache
+from app.utils.timing import phase
+
+STARTED_EVENTS = {"call.started", "call.start"}
+ENDED_EVENTS = {"call.ended", "call.end"}
+SEEN_KEYS_PER_CALL = 512
+
+
+def dedup_key(evt: WebhookEvent) -> Optional[str]:
+    """Identity of a delivery: VAPI's event id if present, else a hash of the event.
+
+    Transcript events without an id or timestamp get no key: the same words ("Yes.") can
+    legitimately be said twice, so they cannot be told apart from a redelivery.
+    """
+    p = evt.payload
+    event_id = p.get("id") or p.get("eventId")
+    if event_id:
+        return f"id:{event_id}"
+    if evt.event in TRANSCRIPT_EVENTS and p.get("timestamp") is None:
+        return None
+    digest = hashlib.blake2b(orjson.dumps([evt.event, p], option=orjson.OPT_SORT_KEYS), digest_size=16)
+    return digest.hexdigest()
+
+
+@dataclass(slots=True)
+class CallState:
+    """What has already been applied for one VAPI call."""
+
+    call_id: Optional[uuid.UUID] = None  # calls.id, known once loaded from the database
+    started: bool = False
+    ended: bool = False
+    watermark: Optional[datetime] = None  # latest transcript timestamp applied
+    from_db: bool = False  # rebuilt from the database: seen keys before the reload are unknown
+    seen: set[str] = field(default_factory=set)
+    order: deque = field(default_factory=deque)
+
+    def remember(self, key: str) -> None:
+        if key in self.seen:
+            return
+        self.seen.add(key)
+        self.order.append(key)
+        if len(self.order) > SEEN_KEYS_PER_CALL:
+            self.seen.discard(self.order.popleft())
+
+
+# (organization id, VAPI call id): VAPI call ids are only unique per organization
+CallKey = tuple[uuid.UUID, str]
+
+
+class CallSequencer:
+    """Drops duplicate and stale webhook events per call before they reach the database.
+
+    State lives in memory per VAPI call; on a miss (restart, another worker) it is rebuilt from
+    the call row and its transcript segments. `filter` decides and reserves the admitted events'
+    keys, so a redelivery arriving while the first delivery's transaction is still open is
+    dropped too. `record` is called after commit and `release` after a rollback, so events of
+    a failed transaction are not remembered.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._calls: TTLCache[CallKey, CallState] = TTLCache(max_size=max_size, ttl=ttl)
+        self._inflight: Dict[CallKey, set[str]] = {}
+        self.admitted = 0
+        self.duplicates = 0
+        self.inflight_duplicates = 0
+        self.stale = 0
+        self.db_loads = 0
+        self.db_checks = 0
+
+    async def _state(self, db: AsyncSession, call_key: CallKey) -> CallState:
+        state = self._calls.get(call_key)
+        if state is not None:
+            return state
+        self.db_loads += 1
+        seg = models.TranscriptSegment
+        with phase("sequencer_load"):
+            row = (
+                await db.execute(
+                    select(
+                        models.Call.id,
+                        models.Call.started_at,
+                        models.Call.ended_at,
+                        select(func.max(seg.timestamp)).where(seg.call_id == models.Call.id).scalar_subquery(),
+                    ).where(models.Call.organization_id == call_key[0], models.Call.vapi_call_id == call_key[1])
+                )
+            ).first()
+        state = CallState()
+        if row is not None:
+            state = CallState(
+                call_id=row[0],
+                started=row[1] is not None,
+                ended=row[2] is not None,
+                watermark=row[3],
+                from_db=True,
+            )
+        self._calls.set(call_key, state)
+        return state
+
+    async def _segment_exists(self, db: AsyncSession, state: CallState, evt: WebhookEvent) -> bool:
+        """Fallback for a reloaded call: was this transcript line already stored?"""
+        ts = parse_event_timestamp(evt.payload.get("timestamp"))
+        text = evt.payload.get("text") or evt.payload.get("transcript")
+        if not (state.from_db and state.call_id and ts and text and state.watermark and ts <= state.watermark):
+            return False
+        self.db_checks += 1
+        seg = models.TranscriptSegment
+        with phase("sequencer_check"):
+            return bool(
+                await db.scalar(
+                    select(exists().where(seg.call_id == state.call_id, seg.timestamp == ts, seg.text == text))
+                )
+            )
+
+    async def filter(self, db: AsyncSession, org_id: uuid.UUID, events: List[WebhookEvent]) -> List[WebhookEvent]:
+        """Events of one call that are neither duplicates nor stale, in their original order.
+
+        Their keys stay reserved until `record` (committed) or `release` (rolled back).
+        """
+        if not get_settings().WEBHOOK_DEDUP_ENABLED:
+            return events
+        call_key = (org_id, events[0].call_id)
+        state = await self._state(db, call_key)
+        started, ended = state.started, state.ended
+        inflight = self._inflight.get(call_key, set())
+        batch_seen: set[str] = set()
+        admitted = []
+        for evt in events:
+            key = dedup_key(evt)
+            if key is not None and (key in state.seen or key in batch_seen):
+                self.duplicates += 1
+                continue
+            if key is not None and key in inflight:
+                self.inflight_duplicates += 1
+                continue
+            if (evt.event in STARTED_EVENTS and started) or (evt.event in ENDED_EVENTS and ended):
+                self.stale += 1
+                continue
+            if evt.event in TRANSCRIPT_EVENTS and await self._segment_exists(db, state, evt):
+                self.duplicates += 1
+                continue
+            if key is not None:
+                batch_seen.add(key)
+            started = started or evt.event in STARTED_EVENTS
+            ended = ended or evt.event in ENDED_EVENTS
+            admitted.append(evt)
+        if batch_seen:
+            self._inflight.setdefault(call_key, set()).update(batch_seen)
+        self.admitted += len(admitted)
+        return admitted
+
+    def release(self, org_id: uuid.UUID, events: List[WebhookEvent]) -> None:
+        """Drop the reservations of events whose transaction did not commit."""
+        if not events or not get_settings().WEBHOOK_DEDUP_ENABLED:
+            return
+        call_key = (org_id, events[0].call_id)
+        inflight = self._inflight.get(call_key)
+        if inflight is None:
+            return
+        inflight.difference_update(k for k in map(dedup_key, events) if k is not None)
+        if not inflight:
+            del self._inflight[call_key]
+
+    def record(self, org_id: uuid.UUID, call_id: uuid.UUID, events: List[WebhookEvent]) -> None:
+        """Remember events as applied; call after their transaction committed."""
+        if not events or not get_settings().WEBHOOK_DEDUP_ENABLED:
+            return
+        call_key = (org_id, events[0].call_id)
+        state = self._calls.get(call_key) or CallState()
+        state.call_id = call_id
+        for evt in events:
+            key = dedup_key(evt)
+            if key is not None:
+                state.remember(key)
+            state.started = state.started or evt.event in STARTED_EVENTS
+            state.ended = state.ended or evt.event in ENDED_EVENTS
+            if evt.event in TRANSCRIPT_EVENTS:
+                ts = parse_event_timestamp(evt.payload.get("timestamp"))
+                if ts and (state.watermark is None or ts > state.watermark):
+                    state.watermark = ts
+        self._calls.set(call_key, state)
+        self.release(org_id, events)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._calls.stats(),
+            "admitted": self.admitted,
+            "duplicates": self.duplicates,
+            "inflight_duplicates": self.inflight_duplicates,
+            "inflight_calls": len(self._inflight),
+            "stale": self.stale,
+            "db_loads": self.db_loads,
+            "db_checks": self.db_checks,
+        }
+
+
+call_sequencer = CallSequencer(
+    max_size=get_settings().WEBHOOK_DEDUP_MAX_CALLS,
+    ttl=get_settings().WEBHOOK_DEDUP_IDLE_SEC,
+)
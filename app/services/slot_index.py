@@ -0,0 +1,136 @@
+import math
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+from loguru import logger
+
+# CalComAvailabilityResponse.slots shape: {"YYYY-MM-DD": [{"start": ..., "end": ...}]}
+Slots = Dict[str, List[Dict[str, Optional[str]]]]
+
+
+def to_epoch(value: str | datetime) -> float:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _zone(time_zone: Optional[str]) -> tzinfo:
+    try:
+        return ZoneInfo(time_zone) if time_zone else timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def _day_bounds(day: str, zone: tzinfo) -> tuple[float, float]:
+    """[local midnight, next midnight) of a Cal.com day key; unbounded if the key is not a date."""
+    try:
+        first = datetime.combine(date.fromisoformat(day), datetime.min.time(), tzinfo=zone)
+    except ValueError:
+        return -math.inf, math.inf
+    return first.timestamp(), (first + timedelta(days=1)).timestamp()
+
+
+class SlotIndex:
+    """Slots of one fetched Cal.com window, indexed by epoch-second start per day.
+
+    `slots(start, end)` answers any sub-window of [window_start, window_end] and
+    renders it straight into the response shape, reusing Cal.com's own start/end
+    strings (no TimeSlot objects). Every day of the response that overlaps the
+    window is returned, empty ones included; day keys are local dates in
+    `time_zone`, so an index is only shared between requests with the same time
+    zone/duration/format.
+
+    Slots are kept in Cal.com's order. When every start is an ISO timestamp and
+    they are sorted, days are cut by binary search; otherwise (e.g. `format=time`
+    strings) each day is filtered linearly and slots without a parseable start
+    are always kept. Items that are not slots at all are dropped and counted in
+    `skipped`.
+    """
+
+    __slots__ = (
+        "window_start",
+        "window_end",
+        "skipped",
+        "starts",
+        "_start_text",
+        "_end_text",
+        "_days",
+        "_day_offsets",
+        "_day_bounds",
+        "_sorted",
+    )
+
+    def __init__(
+        self, data: Dict[str, Any], window_start: float, window_end: float, time_zone: Optional[str] = None
+    ):
+        self.window_start = window_start
+        self.window_end = window_end
+        self.skipped = 0
+        zone = _zone(time_zone)
+        starts: List[float] = []
+        self._start_text: List[str] = []
+        self._end_text: List[Optional[str]] = []
+        self._days: List[str] = sorted(data)
+        offsets = []
+        bounds = []
+        for day in self._days:
+            offsets.append(len(starts))
+            bounds.append(_day_bounds(day, zone))
+            for item in data[day] or []:
+                if isinstance(item, dict):
+                    start, end = item.get("start", ""), item.get("end")
+                elif isinstance(item, str):
+                    # If format is 'time', slots might be just strings
+                    start, end = item, None
+                else:
+                    start = None
+                if not isinstance(start, str):
+                    self.skipped += 1
+                    continue
+                try:
+                    starts.append(to_epoch(start))
+                except ValueError:
+                    starts.append(math.nan)
+                self._start_text.append(start)
+                self._end_text.append(end)
+        offsets.append(len(starts))
+        if self.skipped:
+            logger.warning("Dropped {} Cal.com availability items that are not slots", self.skipped)
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self._day_offsets = np.asarray(offsets, dtype=np.int64)
+        self._day_bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 2)
+        self._sorted = bool(not np.isnan(self.starts).any() and np.all(np.diff(self.starts) >= 0))
+
+    def __len__(self) -> int:
+        return len(self._start_text)
+
+    def covers(self, start: float, end: float) -> bool:
+        return self.window_start <= start and end <= self.window_end
+
+    def slots(self, start: float, end: float) -> Slots:
+        """Slots starting in [start, end], grouped by day."""
+        whole = start <= self.window_start and self.window_end <= end
+        result: Slots = {}
+        for d, day in enumerate(self._days):
+            day_start, day_end = self._day_bounds[d]
+            if not whole and (day_start > end or day_end <= start):
+                continue
+            first, last = int(self._day_offsets[d]), int(self._day_offsets[d + 1])
+            if whole:
+                rows = range(first, last)
+            elif self._sorted:
+                day_starts = self.starts[first:last]
+                rows = range(
+                    first + int(np.searchsorted(day_starts, start, side="left")),
+                    first + int(np.searchsorted(day_starts, end, side="right")),
+                )
+            else:
+                day_starts = self.starts[first:last]
+                keep = np.isnan(day_starts) | ((day_starts >= start) & (day_starts <= end))
+                rows = (first + int(i) for i in np.flatnonzero(keep))
+            result[day] = [{"start": self._start_text[i], "end": self._end_text[i]} for i in rows]
+        return result
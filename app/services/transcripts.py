@@ -0,0 +1,138 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert, literal, select, func
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.utils.cache import TTLCache
+from app.utils.timing import phase
+from app import models
+
+TRANSCRIPT_EVENTS = {"transcript", "call.transcript", "call.transcript.partial", "call.transcript.final"}
+
+
+def is_final(event: str, payload: Dict[str, Any]) -> bool:
+    """Partials are superseded by a later final; anything not marked partial counts as final."""
+    return event != "call.transcript.partial" and payload.get("transcriptType") != "partial"
+
+
+def parse_event_timestamp(value: Any) -> Optional[datetime]:
+    """VAPI sends epoch milliseconds or ISO strings; None lets the column default to now()."""
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value / 1000 if value > 1e11 else value, tz=timezone.utc)
+        if isinstance(value, str):
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, OverflowError, OSError):
+        pass
+    return None
+
+
+def _assembled_transcript(call_id: uuid.UUID):
+    seg = models.TranscriptSegment
+    # Ordered by event time so late deliveries land in place; seq breaks ties (and orders untimed events)
+    return select(func.string_agg(seg.text, aggregate_order_by(literal("\n"), seg.timestamp, seg.seq))).where(
+        seg.call_id == call_id, seg.is_final.is_(True)
+    )
+
+
+async def append_segment(
+    db: AsyncSession,
+    call_id: uuid.UUID,
+    event: str,
+    payload: Dict[str, Any],
+    text: str,
+) -> None:
+    """Append one transcript segment (a single-row INSERT; calls.transcript is left untouched)."""
+    values: Dict[str, Any] = {
+        "call_id": call_id,
+        "role": payload.get("role"),
+        "text": text,
+        "is_final": is_final(event, payload),
+    }
+    ts = parse_event_timestamp(payload.get("timestamp"))
+    if ts is not None:
+        values["timestamp"] = ts
+    with phase("transcript_append"):
+        await db.execute(insert(models.TranscriptSegment).values(**values))
+
+
+async def materialize_transcript(db: AsyncSession, call: models.Call) -> None:
+    """Assemble final segments into calls.transcript once, when the call ends."""
+    with phase("transcript_materialize"):
+        text = await db.scalar(_assembled_transcript(call.id))
+    if text is not None:
+        call.transcript = text
+
+
+def assemble_transcript(db: Session, call_id: uuid.UUID) -> Optional[str]:
+    """Transcript of a call that has not ended (or was never materialized), built from its segments."""
+    return db.scalar(_assembled_transcript(call_id))
+
+
+@dataclass(frozen=True, slots=True)
+class LivePartial:
+    role: Optional[str]
+    text: str
+    updated_at: datetime
+
+
+class LivePartials:
+    """Latest partial utterance per (organization, VAPI call, role), held in memory instead of being persisted.
+
+    Each partial replaces the previous one for its role; a final for that role clears it.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._calls: TTLCache[tuple[uuid.UUID, str], Dict[Optional[str], LivePartial]] = TTLCache(
+            max_size=max_size, ttl=ttl
+        )
+        self.buffered = 0
+        self.superseded = 0
+        self.finalized = 0
+
+    def update(self, organization_id: uuid.UUID, vapi_call_id: str, role: Optional[str], text: str) -> None:
+        key = (organization_id, vapi_call_id)
+        partials = dict(self._calls.get(key) or {})
+        if role in partials:
+            self.superseded += 1
+        partials[role] = LivePartial(role=role, text=text, updated_at=datetime.now(timezone.utc))
+        self._calls.set(key, partials)
+        self.buffered += 1
+
+    def finalize(self, organization_id: uuid.UUID, vapi_call_id: str, role: Optional[str]) -> None:
+        key = (organization_id, vapi_call_id)
+        partials = self._calls.get(key)
+        if not partials or role not in partials:
+            return
+        self.finalized += 1
+        remaining = {r: lp for r, lp in partials.items() if r != role}
+        if remaining:
+            self._calls.set(key, remaining)
+        else:
+            self._calls.pop(key)
+
+    def forget(self, organization_id: uuid.UUID, vapi_call_id: str) -> None:
+        self._calls.pop((organization_id, vapi_call_id))
+
+    def get(self, organization_id: uuid.UUID, vapi_call_id: str) -> List[LivePartial]:
+        return sorted((self._calls.get((organization_id, vapi_call_id)) or {}).values(), key=lambda lp: lp.updated_at)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._calls.stats(),
+            "buffered": self.buffered,
+            "superseded": self.superseded,
+            "finalized": self.finalized,
+        }
+
+
+live_partials = LivePartials(
+    max_size=get_settings().LIVE_PARTIAL_MAX_SIZE,
+    ttl=get_settings().LIVE_PARTIAL_TTL_SEC,
+)
@@ -1,8 +1,10 @@
+import sys
+
 import requests
 from loguru import logger
 
 from app.config import get_settings
-from app.utils.vapi import TOOLS, VAPI_BASE_URL
+from app.utils.vapi import FUNCTION_TOOLS, TOOLS, VAPI_BASE_URL
 
 HEADERS = {
     "Authorization": f"Bearer {get_settings().VAPI_API_TOKEN}",
@@ -72,8 +74,10 @@ def attach_tools(tool_ids: list[str]):
 
 
 def main():
+    # --function-tools: register the DB tools as function tools batched via /api/tools/tool-calls
+    tools = FUNCTION_TOOLS if "--function-tools" in sys.argv[1:] else TOOLS
     tool_ids = []
-    for tool in TOOLS:
+    for tool in tools:
         tool_id = upsert_tool(tool)
         tool_ids.append(tool_id)
 
@@ -0,0 +1,180 @@
+import asyncio
+import zlib
+from time import monotonic
+from typing import Any, Dict, List
+
+from loguru import logger
+
+from app.config import get_settings
+from app.db import AsyncSessionLocal
+from app.schemas.webhooks import WebhookEvent
+from app.services.webhooks import process_call_events
+
+_STOP = object()
+
+
+class WebhookIngestQueue:
+    """Acknowledge-first ingestion of VAPI webhook events.
+
+    Events are partitioned by call id over `workers` queues, so one call's events
+    are always handled in order by the same worker. A worker takes up to
+    `batch_size` waiting events, groups them by call and applies each group in one
+    transaction. `start`/`stop` are driven by the FastAPI lifespan; `stop` drains.
+    A worker that dies from an exception is logged and restarted on its queue.
+    """
+
+    def __init__(self, workers: int, max_queue: int, batch_size: int):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self.enqueued = 0
+        self.processed = 0
+        self.skipped = 0  # unknown assistant, duplicate or stale
+        self.failed = 0
+        self.overflow = 0  # enqueues refused because the partition was full
+        self.restarts = 0
+        self.transactions = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.lag_ms_last = 0.0
+        self.lag_ms_max = 0.0
+        self._lag_ms_sum = 0.0
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        per_worker = max(1, self.max_queue // self.workers)
+        self._queues = [asyncio.Queue(maxsize=per_worker) for _ in range(self.workers)]
+        self._tasks = [self._spawn(i) for i in range(self.workers)]
+
+    def _spawn(self, i: int) -> asyncio.Task:
+        task = asyncio.create_task(self._run(self._queues[i]), name=f"webhook-ingest:{i}")
+        task.add_done_callback(lambda t: self._worker_done(i, t))
+        return task
+
+    def _worker_done(self, i: int, task: asyncio.Task) -> None:
+        if task.cancelled() or i >= len(self._tasks) or self._tasks[i] is not task:
+            return
+        exc = task.exception()
+        if exc is None:
+            return  # drained by stop
+        if self._stopping:
+            logger.opt(exception=exc).error("Webhook ingest worker {} died while draining", i)
+            return
+        logger.opt(exception=exc).error("Webhook ingest worker {} died; restarting it", i)
+        self.restarts += 1
+        self._tasks[i] = self._spawn(i)
+
+    async def stop(self) -> None:
+        """Process everything queued so far, then stop the workers."""
+        if not self._tasks:
+            return
+        self._stopping = True
+        for q, task in zip(self._queues, self._tasks):
+            if not task.done():
+                await q.put(_STOP)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+        self._stopping = False
+
+    def enqueue(self, evt: WebhookEvent) -> bool:
+        """Queue one event. Returns False if not running, or the call's worker is gone or its partition full."""
+        if not self._tasks:
+            return False
+        i = zlib.crc32(evt.call_id.encode()) % self.workers
+        if self._tasks[i].done():
+            return False
+        q = self._queues[i]
+        try:
+            q.put_nowait((evt, monotonic()))
+        except asyncio.QueueFull:
+            self.overflow += 1
+            return False
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, q.qsize())
+        return True
+
+    async def _run(self, q: asyncio.Queue) -> None:
+        while True:
+            item = await q.get()
+            stopping = item is _STOP
+            batch = [] if stopping else [item]
+            while len(batch) < self.batch_size and not q.empty():
+                nxt = q.get_nowait()
+                if nxt is _STOP:
+                    stopping = True
+                    continue
+                batch.append(nxt)
+            if batch:
+                await self._process(batch)
+            if stopping:
+                return
+
+    async def _process(self, batch: List[tuple[WebhookEvent, float]]) -> None:
+        self.batches += 1
+        by_call: Dict[str, List[WebhookEvent]] = {}
+        for evt, _ in batch:
+            by_call.setdefault(evt.call_id, []).append(evt)
+        for events in by_call.values():
+            await self._apply(events)
+        now = monotonic()
+        for _, enqueued_at in batch:
+            lag = (now - enqueued_at) * 1000
+            self.lag_ms_last = lag
+            self.lag_ms_max = max(self.lag_ms_max, lag)
+            self._lag_ms_sum += lag
+
+    async def _apply(self, events: List[WebhookEvent]) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                applied = await process_call_events(db, events)
+            self.transactions += 1
+            self.processed += applied
+            self.skipped += len(events) - applied
+            return
+        except Exception:
+            if len(events) == 1:
+                self.failed += 1
+                logger.exception("Webhook ingest failed for call {}", events[0].call_id)
+                return
+            logger.exception("Webhook ingest batch of {} events failed, retrying one by one", len(events))
+        for evt in events:
+            await self._apply([evt])
+
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def stats(self) -> Dict[str, Any]:
+        done = self.processed + self.skipped + self.failed
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "depth": self.depth(),
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "overflow": self.overflow,
+            "restarts": self.restarts,
+            "batches": self.batches,
+            "transactions": self.transactions,
+            "lag_ms_last": round(self.lag_ms_last, 3),
+            "lag_ms_max": round(self.lag_ms_max, 3),
+            "lag_ms_mean": round(self._lag_ms_sum / done, 3) if done else None,
+        }
+
+
+webhook_ingest = WebhookIngestQueue(
+    workers=get_settings().WEBHOOK_INGEST_WORKERS,
+    max_queue=get_settings().WEBHOOK_INGEST_QUEUE_MAX_SIZE,
+    batch_size=get_settings().WEBHOOK_INGEST_BATCH_SIZE,
+)
@@ -0,0 +1,187 @@
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import models
+from app.config import get_settings
+from app.db import AsyncSessionLocal
+from app.schemas.webhooks import BulkIngestResult, WebhookEvent
+from app.services.audit import log_call_event
+from app.services.calls import forget_call_context, get_or_create_call
+from app.services.sequencing import call_sequencer
+from app.services.transcripts import TRANSCRIPT_EVENTS, append_segment, is_final, live_partials, materialize_transcript
+from app.utils.cache import MISSING, TTLCache
+from app.utils.timing import phase
+
+# vapi_assistant_id -> (organization_id, agent_id); None marks an unknown assistant (shorter TTL)
+assistant_cache: TTLCache[str, tuple[uuid.UUID, uuid.UUID] | None] = TTLCache(
+    max_size=get_settings().ASSISTANT_CACHE_MAX_SIZE,
+    ttl=get_settings().ASSISTANT_CACHE_TTL_SEC,
+)
+
+
+def invalidate_assistant(*assistant_ids: str | None) -> None:
+    """Drop cached resolutions (including negative ones) after an agent's assistant id changed."""
+    for assistant_id in assistant_ids:
+        if assistant_id:
+            assistant_cache.pop(assistant_id)
+
+
+def _get_assistant_id(payload: Dict[str, Any]) -> str | None:
+    p = payload or {}
+    return p.get("assistantId") or (p.get("message") or {}).get("assistantId")
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except Exception:
+        return None
+
+
+async def resolve_agent(db: AsyncSession, payload: Dict[str, Any]) -> tuple[uuid.UUID, uuid.UUID] | None:
+    """(organization_id, agent_id) of the assistant named in the payload, or None if unknown."""
+    assistant_id = _get_assistant_id(payload)
+    if not assistant_id:
+        logger.warning("VAPI webhook: no assistantId, skipping call update")
+        return None
+    cached = assistant_cache.get(assistant_id, MISSING)
+    if cached is not MISSING:
+        return cached
+    with phase("assistant_db"):
+        row = (
+            await db.execute(
+                select(models.Agent.organization_id, models.Agent.id).where(models.Agent.vapi_assistant_id == assistant_id)
+            )
+        ).first()
+    if row is None:
+        logger.warning("VAPI webhook: unknown assistantId {}", assistant_id)
+        assistant_cache.set(assistant_id, None, ttl=get_settings().ASSISTANT_CACHE_NEGATIVE_TTL_SEC)
+        return None
+    agent = (row[0], row[1])
+    assistant_cache.set(assistant_id, agent)
+    return agent
+
+
+async def buffer_partial(db: AsyncSession, evt: WebhookEvent) -> bool:
+    """In TRANSCRIPT_PARTIALS_MODE=buffer, keep partials in memory only. Returns True if the event was absorbed.
+
+    Partials are keyed by the organization of the resolved assistant; events of unknown assistants are
+    left to the regular path, which drops them.
+    """
+    if get_settings().TRANSCRIPT_PARTIALS_MODE != "buffer":
+        return False
+    if evt.event not in TRANSCRIPT_EVENTS and evt.event not in {"call.ended", "call.end"}:
+        return False
+    agent = await resolve_agent(db, evt.payload)
+    if not agent:
+        return False
+    org_id = agent[0]
+    p = evt.payload or {}
+    if evt.event in {"call.ended", "call.end"}:
+        live_partials.forget(org_id, evt.call_id)
+        return False
+    if is_final(evt.event, p):
+        live_partials.finalize(org_id, evt.call_id, p.get("role"))
+        return False
+    text = p.get("text") or p.get("transcript")
+    if text:
+        live_partials.update(org_id, evt.call_id, p.get("role"), text)
+    return True
+
+
+async def apply_event(db: AsyncSession, call: models.Call, evt: WebhookEvent) -> None:
+    """Apply one webhook event to its call (no commit)."""
+    p = evt.payload or {}
+
+    if evt.event in {"call.started", "call.start"}:
+        ts = _parse_ts(p.get("startedAt") or p.get("startTime"))
+        if ts:
+            call.started_at = ts
+
+    if evt.event in {"call.ended", "call.end"}:
+        ts = _parse_ts(p.get("endedAt") or p.get("endTime"))
+        if ts:
+            call.ended_at = ts
+        if p.get("durationSec") is not None:
+            call.duration_sec = int(p["durationSec"])
+        rec = p.get("recordingUrl") or p.get("recording_url")
+        if rec:
+            call.recording_url = rec
+        await materialize_transcript(db, call)
+        forget_call_context(call.organization_id, evt.call_id)
+
+    if evt.event in TRANSCRIPT_EVENTS:
+        text = p.get("text") or p.get("transcript")
+        if text:
+            await append_segment(db, call.id, evt.event, p, text)
+            if call.ended_at is not None and call.transcript is not None and is_final(evt.event, p):
+                # Arrived after call.ended already materialized the transcript
+                call.transcript = call.transcript + "\n" + text
+
+
+async def process_call_events(db: AsyncSession, events: List[WebhookEvent]) -> int:
+    """Apply events of one VAPI call, in order, in a single transaction. Returns how many were applied.
+
+    Duplicate and stale events (see CallSequencer) are dropped first.
+    """
+    agent = None
+    for evt in events:
+        agent = await resolve_agent(db, evt.payload)
+        if agent:
+            break
+    if not agent:
+        return 0
+    org_id, agent_id = agent
+
+    events = await call_sequencer.filter(db, org_id, events)
+    if not events:
+        return 0
+    try:
+        call, _ = await get_or_create_call(db, events[0].call_id, org_id, agent_id)
+        for evt in events:
+            await apply_event(db, call, evt)
+        await db.commit()
+    except BaseException:
+        call_sequencer.release(org_id, events)
+        raise
+    call_sequencer.record(org_id, call.id, events)
+
+    for evt in events:
+        log_call_event(org_id, call.id, evt.event, evt.payload, raw=evt.raw)
+    return len(events)
+
+
+async def process_event_batch(events: List[WebhookEvent], result: BulkIngestResult, concurrency: int) -> None:
+    """Apply events grouped by call: one transaction per call, up to `concurrency` calls at a time.
+
+    Events of a call keep their relative order; `result` is updated in place.
+    """
+    by_call: Dict[str, List[WebhookEvent]] = {}
+    for evt in events:
+        by_call.setdefault(evt.call_id, []).append(evt)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def apply(call_events: List[WebhookEvent]) -> None:
+        async with semaphore:
+            try:
+                async with AsyncSessionLocal() as db:
+                    applied = await process_call_events(db, call_events)
+            except Exception as e:
+                logger.exception("Bulk webhook ingest failed for call {}", call_events[0].call_id)
+                result.failed += len(call_events)
+                result.add_error(f"call {call_events[0].call_id}: {type(e).__name__}")
+                return
+        result.transactions += 1
+        result.processed += applied
+        result.skipped += len(call_events) - applied
+
+    await asyncio.gather(*(apply(call_events) for call_events in by_call.values()))
+
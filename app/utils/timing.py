@@ -0,0 +1,92 @@
+import bisect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Dict, Iterator, Optional
+
+# Phase timings of the current request, as (name, seconds). None outside a request.
+_request_phases: ContextVar[Optional[list[tuple[str, float]]]] = ContextVar("request_phases", default=None)
+
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def start_request_timing() -> list[tuple[str, float]]:
+    """Start collecting phases for this request. Dependencies and threadpool calls share the list."""
+    phases: list[tuple[str, float]] = []
+    _request_phases.set(phases)
+    return phases
+
+
+def record_phase(name: str, seconds: float) -> None:
+    phases = _request_phases.get()
+    if phases is not None:
+        phases.append((name, seconds))
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a block as one phase of the current request (no-op outside a request)."""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, perf_counter() - start)
+
+
+def summarize(phases: list[tuple[str, float]]) -> Dict[str, float]:
+    """Total seconds per phase name, in first-seen order."""
+    totals: Dict[str, float] = {}
+    for name, seconds in phases:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return totals
+
+
+def server_timing_header(totals: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in totals.items())
+
+
+def route_template(path: str, path_params: Dict[str, Any]) -> str:
+    """Collapse path parameter values back into `{name}` so histograms are keyed per route, not per id."""
+    segments = path.split("/")
+    values = {str(v): k for k, v in path_params.items()}
+    return "/".join(f"{{{values[s]}}}" if s in values else s for s in segments)
+
+
+class LatencyHistograms:
+    """Per-(route, phase) latency histograms with fixed millisecond buckets (cumulative in snapshots)."""
+
+    def __init__(self, buckets_ms: tuple[int, ...] = BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._data: Dict[tuple[str, str], list[Any]] = {}  # -> [bucket counts..., +Inf count], count, sum_ms
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, phase_name: str, seconds: float) -> None:
+        ms = seconds * 1000
+        idx = bisect.bisect_left(self.buckets_ms, ms)
+        with self._lock:
+            entry = self._data.get((route, phase_name))
+            if entry is None:
+                entry = self._data[(route, phase_name)] = [[0] * (len(self.buckets_ms) + 1), 0, 0.0]
+            entry[0][idx] += 1
+            entry[1] += 1
+            entry[2] += ms
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (route, phase_name), (counts, count, sum_ms) in sorted(self._data.items()):
+                cumulative = [sum(counts[: i + 1]) for i in range(len(counts))]
+                out.setdefault(route, {})[phase_name] = {
+                    "count": count,
+                    "sum_ms": round(sum_ms, 3),
+                    "mean_ms": round(sum_ms / count, 3) if count else None,
+                    "buckets_ms": {
+                        **{f"le_{b}": c for b, c in zip(self.buckets_ms, cumulative)},
+                        "le_inf": cumulative[-1],
+                    },
+                }
+        return out
+
+
+latency_histograms = LatencyHistograms()
@@ -237,3 +237,24 @@ TOOLS = [
         },
     },
 ]
+
+# Tools served by POST /api/tools/tool-calls. Registered as VAPI "function" tools they are
+# batched into one tool-calls server message per turn instead of one HTTPS request each.
+TOOL_CALLS_URL = f"{BASE_URL}/api/tools/tool-calls"
+FUNCTION_TOOL_NAMES = {"upsertLead", "saveFitCheck", "qualifyAndTag", "logOutcome", "handoffRequest"}
+
+FUNCTION_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": tool["name"],
+            "parameters": tool["body"],
+        },
+        "server": {
+            "url": TOOL_CALLS_URL,
+            "headers": {"x-api-key": TOOL_API_KEY},
+        },
+    }
+    for tool in TOOLS
+    if tool["name"] in FUNCTION_TOOL_NAMES
+] + [tool for tool in TOOLS if tool["name"] not in FUNCTION_TOOL_NAMES]
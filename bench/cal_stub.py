@@ -0,0 +1,84 @@
+"""Minimal Cal.com v2 stand-in for benchmarks: /slots and /bookings with a configurable delay."""
+import asyncio
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+
+def create_app(latency_ms: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    delay = latency_ms / 1000
+
+    @app.get("/slots")
+    async def slots(start: str, end: str):
+        if delay:
+            await asyncio.sleep(delay)
+        day = datetime.fromisoformat(start.replace("Z", "+00:00")).replace(hour=9, minute=0, second=0, microsecond=0)
+        last = datetime.fromisoformat(end.replace("Z", "+00:00"))
+        data: dict[str, list[dict[str, str]]] = {}
+        while day < last and len(data) < 28:
+            data[day.date().isoformat()] = [
+                {"start": (day + timedelta(minutes=30 * i)).isoformat().replace("+00:00", "Z")} for i in range(16)
+            ]
+            day += timedelta(days=1)
+        return {"status": "success", "data": data}
+
+    @app.get("/bookings")
+    async def list_bookings():
+        if delay:
+            await asyncio.sleep(delay)
+        return {"status": "success", "data": {"bookings": []}}
+
+    @app.post("/bookings")
+    async def create_booking(request: Request):
+        if delay:
+            await asyncio.sleep(delay)
+        body = await request.json()
+        start = datetime.fromisoformat(body["start"].replace("Z", "+00:00")).astimezone(timezone.utc)
+        return {
+            "status": "success",
+            "data": {
+                "id": int(time.time() * 1000) % 2**31,
+                "uid": uuid.uuid4().hex,
+                "title": "Audit",
+                "status": "accepted",
+                "start": start.isoformat().replace("+00:00", "Z"),
+                "end": (start + timedelta(minutes=15)).isoformat().replace("+00:00", "Z"),
+                "attendees": [body.get("attendee", {})],
+            },
+        }
+
+    return app
+
+
+class CalStubServer:
+    """Runs the stub on a background uvicorn thread (its own event loop, so it never shares the app's)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, latency_ms: float = 0.0):
+        self.host = host
+        self.port = port
+        self.server = uvicorn.Server(
+            uvicorn.Config(create_app(latency_ms), host=host, port=port, log_level="warning", access_log=False)
+        )
+        self._thread = threading.Thread(target=self.server.run, name="cal-stub", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self) -> "CalStubServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f"Cal.com stub did not start on {self.base_url}")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self._thread.join(timeout=5)
@@ -0,0 +1,346 @@
+"""End-to-end call-session benchmark.
+
+Drives simulated VAPI conversations through the FastAPI app in-process (httpx ASGITransport) against the
+configured PostgreSQL and a stubbed Cal.com, then writes latency percentiles per endpoint, throughput and
+DB statements per call to a JSON file.
+
+Usage:
+    python -m bench.calls --calls 200 --concurrency 20 --cal-latency-ms 80
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+from sqlalchemy import event
+
+from bench.cal_stub import CalStubServer
+
+# Statement counter for the simulated call the current request belongs to (None for background work).
+_statements: ContextVar[Optional[list[int]]] = ContextVar("bench_statements", default=None)
+
+TRANSCRIPT_LINES = [
+    ("assistant", "Hi, thanks for calling. Who am I speaking with?"),
+    ("user", "Hi, it's Sam from Brightside Plumbing."),
+    ("assistant", "Great, what made you call today?"),
+    ("user", "We get enquiries but a lot of them go cold before we reply."),
+    ("assistant", "How quickly do you usually get back to new enquiries?"),
+    ("user", "Usually same day, sometimes the next morning."),
+    ("assistant", "And how are bookings made at the moment?"),
+    ("user", "Mostly over the phone, we don't have an online calendar."),
+    ("assistant", "Do you have capacity for more jobs over the next few weeks?"),
+    ("user", "Yes, we could take on a few more each week."),
+]
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize_ms(values: List[float]) -> Dict[str, Any]:
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else None,
+        "p50_ms": _round(percentile(ordered, 50)),
+        "p95_ms": _round(percentile(ordered, 95)),
+        "p99_ms": _round(percentile(ordered, 99)),
+        "max_ms": _round(ordered[-1] if ordered else None),
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.statements_per_call: List[int] = []
+        self.background_statements = 0
+
+    def record(self, endpoint: str, seconds: float, ok: bool) -> None:
+        self.latencies.setdefault(endpoint, []).append(seconds * 1000)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+def install_statement_counter(recorder: Recorder) -> None:
+    from app.db import async_engine, engine
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter = _statements.get()
+        if counter is None:
+            recorder.background_statements += 1
+        else:
+            counter[0] += 1
+
+    for target in (engine, async_engine.sync_engine):
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+
+
+def seed(run_id: str) -> Dict[str, Any]:
+    """Create an organization and an agent wired to the Cal.com stub; returns ids and keys."""
+    from app import models
+    from app.db import SessionLocal
+
+    with SessionLocal() as db:
+        org = models.Organization(name=f"Bench {run_id}", slug=f"bench-{run_id}")
+        db.add(org)
+        db.flush()
+        agent = models.Agent(
+            organization_id=org.id,
+            name="Bench agent",
+            vapi_assistant_id=f"bench-assistant-{run_id}",
+            tool_api_key=f"bench-tool-key-{run_id}",
+            cal_com_api_key=f"cal_bench_{uuid.uuid4().hex}",
+            cal_com_event_type_id=1,
+        )
+        db.add(agent)
+        db.commit()
+        return {
+            "org_id": org.id,
+            "assistant_id": agent.vapi_assistant_id,
+            "tool_api_key": agent.tool_api_key,
+        }
+
+
+def cleanup(org_id: uuid.UUID) -> None:
+    from app import models
+    from app.db import SessionLocal
+
+    with SessionLocal() as db:
+        org = db.get(models.Organization, org_id)
+        if org is not None:
+            db.delete(org)
+            db.commit()
+
+
+async def simulate_call(
+    client: httpx.AsyncClient,
+    recorder: Recorder,
+    seeded: Dict[str, Any],
+    n: int,
+    transcript_events: int,
+    think: float,
+) -> None:
+    counter = [0]
+    _statements.set(counter)
+    vapi_call_id = f"bench-call-{uuid.uuid4().hex}"
+    tool_headers = {"X-API-KEY": seeded["tool_api_key"]}
+    lines = iter(TRANSCRIPT_LINES * (transcript_events // len(TRANSCRIPT_LINES) + 1))
+    started = datetime.now(timezone.utc)
+
+    async def send(endpoint: str, method: str, url: str, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        t0 = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        recorder.record(endpoint, time.perf_counter() - t0, ok)
+        if think:
+            await asyncio.sleep(random.uniform(0, 2 * think))
+        return response.json() if ok and response is not None else None
+
+    async def webhook(evt: str, payload: Dict[str, Any]) -> None:
+        payload = {"assistantId": seeded["assistant_id"], **payload}
+        await send(f"webhook:{evt}", "POST", "/api/webhooks/vapi/events",
+                   json={"event": evt, "call_id": vapi_call_id, "payload": payload})
+
+    async def transcript(count: int) -> None:
+        for _ in range(count):
+            role, text = next(lines)
+            await webhook("call.transcript", {"role": role, "text": text})
+
+    per_gap = max(transcript_events // 6, 1)
+    await webhook("call.started", {"startedAt": started.isoformat()})
+    await transcript(per_gap)
+
+    lead = await send("tool:upsertLead", "POST", "/api/tools/leads/upsert", headers=tool_headers, json={
+        "call_id": vapi_call_id,
+        "name": "Sam Carter",
+        "business_name": "Brightside Plumbing",
+        "phone": f"+44770{n:07d}",
+        "email": f"sam{n}@example.com",
+        "industry": "trades",
+    })
+    lead_id = lead["lead_id"] if lead else None
+    await transcript(per_gap)
+
+    if lead_id:
+        await send("tool:saveFitCheck", "POST", "/api/tools/fit-check/save", headers=tool_headers, json={
+            "call_id": vapi_call_id,
+            "lead_id": lead_id,
+            "business_offer": "Emergency plumbing",
+            "lead_sources": ["google", "referrals"],
+            "weekly_enquiries": "20-50",
+            "response_speed": "same_day",
+            "booking_method": "phone",
+            "has_followup_system": False,
+            "capacity_next_weeks": True,
+            "primary_intent": "stop_going_cold",
+        })
+        await transcript(per_gap)
+        await send("tool:qualifyAndTag", "POST", "/api/tools/qualification/score", headers=tool_headers, json={
+            "call_id": vapi_call_id,
+            "lead_id": lead_id,
+            "diagnosis_tag": "#leak-speed",
+            "one_sentence_summary": "Same-day replies let enquiries go cold.",
+        })
+    await transcript(per_gap)
+
+    availability = await send("tool:getAvailability", "GET", "/api/bookings/availability", headers=tool_headers)
+    slot = None
+    if availability:
+        days = (availability.get("data") or {}).get("slots") or {}
+        slot = next((s["start"] for day in days.values() for s in day), None)
+    await transcript(per_gap)
+
+    if slot:
+        await send("tool:bookAudit", "POST", "/api/bookings", headers=tool_headers, json={
+            "email": f"sam{n}@example.com",
+            "name": "Sam Carter",
+            "phoneNumber": "+447700900123",
+            "start": slot,
+        })
+    await send("tool:logOutcome", "POST", "/api/tools/outcome/log", headers=tool_headers, json={
+        "call_id": vapi_call_id,
+        "lead_id": lead_id,
+        "outcome_tag": "#audit-booked" if slot else "#callback-scheduled",
+    })
+    await transcript(max(transcript_events - 5 * per_gap, 0))
+
+    ended = datetime.now(timezone.utc)
+    await webhook("call.ended", {
+        "endedAt": (max(ended, started + timedelta(seconds=1))).isoformat(),
+        "durationSec": max(int((ended - started).total_seconds()), 1),
+    })
+    recorder.statements_per_call.append(counter[0])
+
+
+async def run(args: argparse.Namespace, cal_base_url: str) -> Dict[str, Any]:
+    from app.main import app
+
+    recorder = Recorder()
+    install_statement_counter(recorder)
+    run_id = uuid.uuid4().hex[:10]
+    seeded = seed(run_id)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(n: int) -> None:
+        async with semaphore:
+            await simulate_call(client, recorder, seeded, n, args.transcript_events, args.think_ms / 1000)
+
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+                if args.warmup:
+                    await asyncio.gather(*(one(args.calls + n) for n in range(args.warmup)))
+                    recorder.reset()
+                t0 = time.perf_counter()
+                await asyncio.gather(*(one(n) for n in range(args.calls)))
+                elapsed = time.perf_counter() - t0
+    finally:
+        if not args.keep_data:
+            cleanup(seeded["org_id"])
+
+    all_latencies = [v for values in recorder.latencies.values() for v in values]
+    statements = sorted(recorder.statements_per_call)
+    return {
+        "run_id": run_id,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "calls": args.calls,
+            "concurrency": args.concurrency,
+            "transcript_events": args.transcript_events,
+            "think_ms": args.think_ms,
+            "cal_latency_ms": args.cal_latency_ms,
+            "cal_base_url": cal_base_url,
+            "warmup": args.warmup,
+        },
+        "elapsed_sec": round(elapsed, 3),
+        "throughput": {
+            "calls_per_sec": round(args.calls / elapsed, 3) if elapsed else None,
+            "requests_per_sec": round(len(all_latencies) / elapsed, 3) if elapsed else None,
+        },
+        "endpoints": {
+            name: {**summarize_ms(values), "errors": recorder.errors.get(name, 0)}
+            for name, values in sorted(recorder.latencies.items())
+        },
+        "overall": {**summarize_ms(all_latencies), "errors": sum(recorder.errors.values())},
+        "db_statements": {
+            "per_call_mean": round(sum(statements) / len(statements), 2) if statements else None,
+            "per_call_p50": _round(percentile(statements, 50)),
+            "per_call_p95": _round(percentile(statements, 95)),
+            "per_call_max": statements[-1] if statements else None,
+            "background_total": recorder.background_statements,
+        },
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulated VAPI call-session load against the app.")
+    parser.add_argument("--calls", type=int, default=100, help="Number of simulated calls.")
+    parser.add_argument("--concurrency", type=int, default=10, help="Calls in flight at once.")
+    parser.add_argument("--transcript-events", type=int, default=12, help="Transcript webhooks per call.")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Mean pause between requests of one call.")
+    parser.add_argument("--warmup", type=int, default=5, help="Calls run (and discarded) before measuring.")
+    parser.add_argument("--cal-latency-ms", type=float, default=50.0, help="Delay added by the Cal.com stub.")
+    parser.add_argument("--cal-port", type=int, default=8765)
+    parser.add_argument("--keep-data", action="store_true", help="Keep the seeded organization and its rows.")
+    parser.add_argument("--out", type=Path, default=None, help="Result file (default bench/results/calls-<ts>.json).")
+    args = parser.parse_args()
+
+    with CalStubServer(port=args.cal_port, latency_ms=args.cal_latency_ms) as stub:
+        # Must be set before the app is imported: the Cal.com base URL is read at import time.
+        os.environ["CAL_COM_BASE_URL"] = stub.base_url
+        result = asyncio.run(run(args, stub.base_url))
+
+    out = args.out or Path(__file__).parent / "results" / f"calls-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2))
+
+    print(f"{args.calls} calls in {result['elapsed_sec']}s "
+          f"({result['throughput']['calls_per_sec']} calls/s, {result['throughput']['requests_per_sec']} req/s)")
+    print(f"{'endpoint':<24}{'n':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'err':>6}")
+    for name, s in result["endpoints"].items():
+        print(f"{name:<24}{s['count']:>7}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['errors']:>6}")
+    print(f"DB statements per call: mean {result['db_statements']['per_call_mean']}, "
+          f"p95 {result['db_statements']['per_call_p95']} (+{result['db_statements']['background_total']} background)")
+    print(f"Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
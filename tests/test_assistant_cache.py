@@ -0,0 +1,96 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app import models
+from app.models.enums import UseCase
+from app.routers import orgs
+from app.schemas.agents import AgentUpdate
+from app.services.webhooks import assistant_cache, resolve_agent
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    assistant_cache.clear()
+    yield
+    assistant_cache.clear()
+
+
+class Rows:
+    def __init__(self, row):
+        self.row = row
+
+    def first(self):
+        return self.row
+
+
+class CountingSession:
+    """Async session answering the assistant lookup with a fixed row."""
+
+    def __init__(self, row):
+        self.row = row
+        self.queries = 0
+
+    async def execute(self, stmt):
+        self.queries += 1
+        return Rows(self.row)
+
+
+def test_resolutions_are_cached_including_unknown_assistants():
+    org_id, agent_id = uuid.uuid4(), uuid.uuid4()
+    known, unknown = CountingSession((org_id, agent_id)), CountingSession(None)
+
+    async def run():
+        for _ in range(3):
+            assert await resolve_agent(known, {"assistantId": "asst-known"}) == (org_id, agent_id)
+            assert await resolve_agent(unknown, {"message": {"assistantId": "asst-unknown"}}) is None
+
+    asyncio.run(run())
+    assert (known.queries, unknown.queries) == (1, 1)
+
+
+class AgentQuery:
+    def __init__(self, agent):
+        self.agent = agent
+
+    def filter(self, *criteria):
+        return self
+
+    def first(self):
+        return self.agent
+
+
+class AgentSession:
+    def __init__(self, agent):
+        self.agent = agent
+
+    def query(self, model):
+        return AgentQuery(self.agent)
+
+    def commit(self):
+        pass
+
+    def refresh(self, obj):
+        pass
+
+
+def test_changing_the_assistant_id_drops_both_cached_resolutions():
+    org = models.Organization(id=uuid.uuid4())
+    agent = models.Agent(
+        id=uuid.uuid4(),
+        organization_id=org.id,
+        name="Front desk",
+        use_case=UseCase.lead_qualification,
+        tool_api_key="sk_test",
+        vapi_assistant_id="asst-old",
+        created_at=datetime.now(timezone.utc),
+    )
+    assistant_cache.set("asst-old", (org.id, agent.id))
+    assistant_cache.set("asst-new", None)  # looked up before the agent was linked to it
+
+    orgs.update_agent(agent.id, AgentUpdate(vapi_assistant_id="asst-new"), org=org, db=AgentSession(agent))
+
+    assert assistant_cache.peek("asst-old") is None
+    assert assistant_cache.peek("asst-new", "missing") == "missing"
@@ -0,0 +1,52 @@
+import uuid
+
+import orjson
+
+from app.config import get_settings
+from app.models.enums import CallEventType
+from app.services import audit
+from app.services.audit import log_call_event, trim_payload
+
+
+def _size(value) -> int:
+    return len(orjson.dumps(value))
+
+
+def test_small_payload_is_kept_as_is():
+    payload = {"role": "user", "text": "hello"}
+    assert trim_payload(payload, 2048) == (payload, False)
+
+
+def test_long_strings_and_lists_are_shortened_to_fit():
+    payload = {"role": "user", "text": "x" * 5000, "messages": list(range(100))}
+    trimmed, truncated = trim_payload(payload, 1024)
+    assert truncated and _size(trimmed) <= 1024
+    assert trimmed["role"] == "user"
+    assert trimmed["text"].startswith("xxx") and trimmed["text"].endswith("…")
+    assert trimmed["messages"] == list(range(10))
+
+
+def test_nested_values_are_dropped_before_scalars():
+    payload = {"status": "ended", "analysis": {f"k{i}": "v" * 40 for i in range(100)}}
+    assert trim_payload(payload, 256) == ({"status": "ended"}, True)
+
+
+def test_payload_that_cannot_fit_is_stored_empty():
+    assert trim_payload({f"k{i}": i for i in range(100)}, 64) == (None, True)
+
+
+def test_event_types_are_sampled(monkeypatch):
+    queued = []
+    monkeypatch.setattr(get_settings(), "CALL_EVENT_SAMPLE_RATES", {"transcript.partial": 0.25})
+    monkeypatch.setattr(audit.call_event_writer, "enqueue", queued.append)
+    monkeypatch.setattr(audit, "call_events_sampled_out", {})
+    rolls = iter([0.1, 0.9, 0.5])
+    monkeypatch.setattr(audit.random, "random", lambda: next(rolls))
+    org_id, call_id = uuid.uuid4(), uuid.uuid4()
+
+    for _ in range(3):
+        log_call_event(org_id, call_id, "call.transcript.partial", {"text": "hi"})
+    log_call_event(org_id, call_id, "call.started", {})
+
+    assert [row["event_type"] for row in queued] == [CallEventType.transcript_partial, CallEventType.call_started]
+    assert audit.call_events_sampled_out == {"transcript.partial": 2}
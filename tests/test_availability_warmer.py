@@ -0,0 +1,54 @@
+import asyncio
+
+from app.services import availability_warmer as warmer_module
+from app.services.availability_warmer import AvailabilityWarmer
+from app.services.bookings import AvailabilityCache, AvailabilityKey
+from app.services.slot_index import SlotIndex
+
+KEY = AvailabilityKey("cal_key", "https://api.cal.com/v2", 42, None, None, None)
+
+
+async def fetch(start: float, end: float) -> SlotIndex:
+    return SlotIndex({}, start, end)
+
+
+def test_warm_skips_only_fresh_entries_covering_the_window():
+    async def run():
+        fresh = AvailabilityCache(max_size=10, ttl=60, stale_ttl=60)
+        stale = AvailabilityCache(max_size=10, ttl=0, stale_ttl=60)
+        return [
+            await fresh.warm(KEY, 1_000.0, 2_000.0, fetch),
+            await fresh.warm(KEY, 1_000.0, 2_000.0, fetch),  # fresh and covering
+            await fresh.warm(KEY, 1_000.0, 3_000.0, fetch),  # fresh but narrower than asked
+            await stale.warm(KEY, 1_000.0, 2_000.0, fetch),
+            await stale.warm(KEY, 1_000.0, 2_000.0, fetch),  # stale
+        ]
+
+    assert asyncio.run(run()) == [True, False, True, True, True]
+
+
+def test_cycle_counts_fetched_skipped_and_failed_targets(monkeypatch):
+    targets = [("key-a", 1), ("key-b", 2), (None, 3)]
+
+    async def load_targets(self):
+        return targets
+
+    async def warm_availability(api_key, event_type_id):
+        if event_type_id == 3:
+            raise RuntimeError("Cal.com down")
+        return KEY._replace(event_type_id=event_type_id), event_type_id == 1
+
+    monkeypatch.setattr(AvailabilityWarmer, "load_targets", load_targets)
+    monkeypatch.setattr(warmer_module, "warm_availability", warm_availability)
+    warmer = AvailabilityWarmer(scope="all", interval=15, concurrency=2, jitter=0, recent_hours=24)
+
+    asyncio.run(warmer.warm_once())
+
+    stats = warmer.stats()
+    assert {k: stats[k] for k in ("targets", "cycles", "fetched", "skipped_fresh", "failed")} == {
+        "targets": 3,
+        "cycles": 1,
+        "fetched": 1,
+        "skipped_fresh": 1,
+        "failed": 1,
+    }
@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+
+from app.schemas.bookings import CreateBookingRequest
+from app.services import bookings
+from app.services.bookings import AvailabilityCache, AvailabilityKey, create_booking
+from app.services.slot_index import SlotIndex
+
+KEY = AvailabilityKey("cal_key", "https://api.cal.com/v2", 42, None, None, None)
+OTHER = KEY._replace(event_type_id=43)
+WINDOW = (1_000.0, 2_000.0)
+
+
+class Fetcher:
+    """Counts fetches; each returns a new index, optionally after waiting for `gate`."""
+
+    def __init__(self, gate: asyncio.Event | None = None):
+        self.calls = 0
+        self.gate = gate
+
+    async def __call__(self, start: float, end: float) -> SlotIndex:
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return SlotIndex({}, start, end)
+
+
+def test_fresh_entries_are_served_without_fetching():
+    async def run():
+        cache, fetch = AvailabilityCache(max_size=10, ttl=60, stale_ttl=60), Fetcher()
+        first = await cache.get(KEY, *WINDOW, fetch)
+        assert await cache.get(KEY, 1_200.0, 1_500.0, fetch) is first
+        return cache, fetch
+
+    cache, fetch = asyncio.run(run())
+    assert fetch.calls == 1 and cache.stats()["fresh_hits"] == 1
+
+
+def test_stale_entries_are_served_while_one_background_refresh_runs():
+    async def run():
+        cache = AvailabilityCache(max_size=10, ttl=0, stale_ttl=60)
+        stale = await cache.get(KEY, *WINDOW, Fetcher())
+        gate = asyncio.Event()
+        refresh = Fetcher(gate)
+        assert await cache.get(KEY, *WINDOW, refresh) is stale
+        assert await cache.get(KEY, *WINDOW, refresh) is stale
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.sleep(0.01)
+        assert await cache.get(KEY, *WINDOW, Fetcher()) is not stale
+        return cache, refresh
+
+    cache, refresh = asyncio.run(run())
+    assert refresh.calls == 1  # both stale reads shared one refresh
+    assert cache.stats()["stale_hits"] == 3
+
+
+def test_fetch_started_before_an_invalidation_is_not_stored():
+    async def run():
+        cache, gate = AvailabilityCache(max_size=10, ttl=60, stale_ttl=60), asyncio.Event()
+        await cache.get(OTHER, *WINDOW, Fetcher())
+        pending = asyncio.create_task(cache.get(KEY, *WINDOW, Fetcher(gate)))
+        await asyncio.sleep(0)
+        assert cache.invalidate(42) == 0
+        gate.set()
+        await pending
+        return cache
+
+    cache = asyncio.run(run())
+    assert cache.age(KEY) is None
+    assert cache.age(OTHER) is not None  # other event types are untouched
+
+
+def test_booking_drops_cached_availability_of_its_event_type(monkeypatch):
+    cache = AvailabilityCache(max_size=10, ttl=60, stale_ttl=60)
+    monkeypatch.setattr(bookings, "availability_cache", cache)
+
+    async def post(url, **kwargs):
+        return httpx.Response(200, json={"data": {"id": 1, "uid": "b1"}}, request=httpx.Request("POST", url))
+
+    monkeypatch.setattr(bookings.cal_com, "post", post)
+
+    async def run():
+        await cache.get(KEY, *WINDOW, Fetcher())
+        await cache.get(OTHER, *WINDOW, Fetcher())
+        await create_booking(
+            "user-1",
+            CreateBookingRequest(email="ada@example.com", name="Ada", start="2026-03-02T09:00:00Z"),
+            cal_com_api_key="cal_key",
+            cal_com_event_type_id=42,
+        )
+
+    asyncio.run(run())
+    assert cache.age(KEY) is None and cache.age(OTHER) is not None
+    assert cache.stats()["invalidations"] == 1
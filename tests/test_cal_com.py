@@ -0,0 +1,168 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import cal_com as cal_com_module
+from app.services.cal_com import CalComClient, CalComDeadlineExceeded, CallPolicy, CircuitBreaker
+
+
+def _client(**kwargs) -> CalComClient:
+    return CalComClient(
+        max_connections=10,
+        max_keepalive_connections=5,
+        keepalive_expiry=5.0,
+        connect_timeout=1.0,
+        timeout=1.0,
+        **{"http2": False, **kwargs},
+    )
+
+
+def _serve(client: CalComClient, handler) -> list[httpx.Request]:
+    """Route the client's requests to `handler`; returns the list of requests it received."""
+    seen: list[httpx.Request] = []
+
+    async def record(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return await handler(request)
+
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(record))
+    return seen
+
+
+HEADERS = {"Authorization": "Bearer cal_key", "cal-api-version": "2024-09-04"}
+
+
+def test_breakers_are_bounded_and_keyed_by_credential_hash():
+    client = _client(breaker_max_size=2)
+    first = client._breaker("Bearer cal_live_1")
+    assert client._breaker("Bearer cal_live_1") is first
+    for i in range(2, 5):
+        client._breaker(f"Bearer cal_live_{i}")
+
+    assert client.stats()["circuits"]["tracked"] == 2
+    assert client._breaker("Bearer cal_live_1") is not first  # evicted, starts closed again
+    assert not any("cal_live" in key for key in client._breakers._data)
+
+
+def test_one_pooled_client_is_reused_until_stopped():
+    async def run():
+        client = _client()
+        first = client.client  # created on first use outside the lifespan
+        client.start()
+        assert client.client is first and client.opened == 1
+        assert client.limits.max_connections == 10 and client.limits.max_keepalive_connections == 5
+        await client.stop()
+        assert first.is_closed and not client.stats()["open"]
+        assert client.client is not first and client.opened == 2
+        await client.stop()
+
+    asyncio.run(run())
+
+
+def test_http2_needs_the_h2_package(monkeypatch):
+    monkeypatch.setattr(cal_com_module, "find_spec", lambda name: None)
+    assert _client(http2=True).http2 is False
+
+
+def test_identical_gets_share_one_request_and_survive_a_cancelled_waiter():
+    async def run():
+        client, release = _client(), asyncio.Event()
+
+        async def slow(request):
+            await release.wait()
+            return httpx.Response(200, json={"ok": True})
+
+        seen = _serve(client, slow)
+        get = lambda **params: client.get("https://cal/slots", headers=HEADERS, params=params, op="slots")
+        first = asyncio.create_task(get(eventTypeId=1))
+        second = asyncio.create_task(get(eventTypeId=1))
+        other = asyncio.create_task(get(eventTypeId=2))
+        await asyncio.sleep(0.01)
+        first.cancel()  # must not cancel the request `second` is waiting on
+        release.set()
+        response = await second
+        await other
+        return client, seen, response, first
+
+    client, seen, response, first = asyncio.run(run())
+    assert first.cancelled() and response.json() == {"ok": True}
+    assert len(seen) == 2
+    stats = client.stats()
+    assert (stats["upstream_gets"], stats["coalesced_gets"], stats["inflight_gets"]) == (2, 1, 0)
+
+
+def test_half_open_breaker_lets_one_trial_through(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cal_com_module, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(threshold=2, reset_after=30)
+    breaker.record(False)
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] += 30
+    assert breaker.allow()  # the trial
+    assert breaker.state == "half_open" and not breaker.allow()
+    breaker.record(False)  # failed trial re-opens for another reset period
+    assert breaker.state == "open" and not breaker.allow()
+
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_slow_request_is_hedged_and_the_faster_answer_wins():
+    async def run():
+        client = _client(policies={"slots": CallPolicy(deadline=2, hedge_after=0.01)})
+
+        async def first_is_slow(request):
+            if len(seen) == 1:
+                await asyncio.sleep(1)
+                return httpx.Response(200, json={"from": "first"})
+            return httpx.Response(200, json={"from": "hedge"})
+
+        seen = _serve(client, first_is_slow)
+        response = await client.get("https://cal/slots", headers=HEADERS, params={}, op="slots")
+        return client, response
+
+    client, response = asyncio.run(run())
+    assert response.json() == {"from": "hedge"}
+    assert (client.hedges["slots"], client.hedge_wins["slots"]) == (1, 1)
+
+
+def test_gets_are_retried_and_posts_are_not():
+    async def run():
+        client = _client(policies={"slots": CallPolicy(deadline=2, retries=2)}, retry_backoff=0)
+        statuses = iter([503, 200, 503])
+
+        async def flaky(request):
+            return httpx.Response(next(statuses))
+
+        seen = _serve(client, flaky)
+        got = await client.get("https://cal/slots", headers=HEADERS, params={}, op="slots")
+        posted = await client.post("https://cal/bookings", headers=HEADERS, json={}, op="slots")
+        return client, seen, got, posted
+
+    client, seen, got, posted = asyncio.run(run())
+    assert (got.status_code, posted.status_code, len(seen)) == (200, 503, 3)
+    assert client.retries["slots"] == 1
+
+
+def test_deadline_covers_the_whole_operation_and_counts_as_a_failure():
+    async def run():
+        client = _client(policies={"slots": CallPolicy(deadline=0.05)}, breaker_failures=1)
+
+        async def hangs(request):
+            await asyncio.sleep(1)
+            return httpx.Response(200)
+
+        _serve(client, hangs)
+        with pytest.raises(CalComDeadlineExceeded):
+            await client.get("https://cal/slots", headers=HEADERS, params={}, op="slots")
+        return client
+
+    client = asyncio.run(run())
+    assert client.deadline_exceeded["slots"] == 1
+    assert client.stats()["circuits"]["open"] == 1
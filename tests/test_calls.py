@@ -0,0 +1,39 @@
+import asyncio
+import uuid
+
+from app.services.calls import CallContext, attach_lead
+
+
+class FakeSession:
+    """Answers db.scalar with queued results and records the statements."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+
+    async def scalar(self, stmt):
+        self.statements.append(stmt)
+        return self.results.pop(0)
+
+
+def test_attach_lead_keeps_a_lead_linked_concurrently():
+    org_id, ours, theirs = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    ctx = CallContext(call_id=uuid.uuid4())
+    # The conditional UPDATE matches no row, then the call is re-read
+    db = FakeSession(None, theirs)
+
+    ctx = asyncio.run(attach_lead(db, ctx, org_id, ours, validate=False))
+
+    assert ctx.lead_id == theirs
+    assert ours in ctx.lead_ids
+    assert len(db.statements) == 2
+
+
+def test_attach_lead_links_when_the_call_has_none():
+    org_id, lead_id = uuid.uuid4(), uuid.uuid4()
+    db = FakeSession(lead_id)
+
+    ctx = asyncio.run(attach_lead(db, CallContext(call_id=uuid.uuid4()), org_id, lead_id, validate=False))
+
+    assert ctx.lead_id == lead_id
+    assert len(db.statements) == 1
@@ -0,0 +1,16 @@
+import pytest
+from pydantic import ValidationError
+
+from app.config import Settings
+
+
+def test_warmer_is_off_and_refreshes_within_the_cache_ttl_by_default():
+    settings = Settings(AVAILABILITY_CACHE_TTL_SEC=30)
+    assert settings.AVAILABILITY_WARMER_MODE == "off"
+    assert settings.AVAILABILITY_WARMER_INTERVAL_SEC == 15
+
+
+def test_warmer_interval_must_be_below_the_cache_ttl():
+    with pytest.raises(ValidationError):
+        Settings(AVAILABILITY_CACHE_TTL_SEC=30, AVAILABILITY_WARMER_INTERVAL_SEC=60)
+    assert Settings(AVAILABILITY_CACHE_TTL_SEC=30, AVAILABILITY_WARMER_INTERVAL_SEC=20).AVAILABILITY_WARMER_INTERVAL_SEC == 20
@@ -0,0 +1,19 @@
+from app import db
+from app.config import get_settings
+
+
+def test_async_url_switches_the_driver_and_keeps_credentials(monkeypatch):
+    monkeypatch.setattr(get_settings(), "ASYNC_DATABASE_URL", None)
+    monkeypatch.setattr(get_settings(), "DATABASE_URL", "postgresql://user:secret@db:5432/app")
+    assert db._async_database_url() == "postgresql+psycopg://user:secret@db:5432/app"
+
+
+def test_explicit_async_url_wins(monkeypatch):
+    monkeypatch.setattr(get_settings(), "ASYNC_DATABASE_URL", "postgresql+asyncpg://user:secret@db/app")
+    assert db._async_database_url() == "postgresql+asyncpg://user:secret@db/app"
+
+
+def test_async_sessions_do_not_expire_attributes_on_commit():
+    # Handlers read ORM attributes after commit; expiring them would lazy-load outside the event loop
+    session = db.AsyncSessionLocal()
+    assert session.sync_session.expire_on_commit is False
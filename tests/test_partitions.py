@@ -0,0 +1,74 @@
+from datetime import date
+
+from app.services import partitions
+from app.services.partitions import ensure_partitions, expire_partitions, expired_partitions
+
+PARTITIONS = ["tool_calls_202409", "tool_calls_202410", "tool_calls_202510", "tool_calls_default"]
+
+
+def test_nothing_expires_without_a_retention():
+    assert expired_partitions(PARTITIONS, 0, today=date(2026, 10, 17)) == []
+
+
+def test_only_whole_months_past_retention_expire():
+    assert expired_partitions(PARTITIONS, 24, today=date(2026, 10, 17)) == ["tool_calls_202409"]
+
+
+class FakeConnection:
+    """Lists `existing` partitions and records every other statement."""
+
+    def __init__(self, existing):
+        self.existing = existing
+        self.statements = []
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        if "pg_inherits" in sql:
+            return [(name,) for name in self.existing]
+        self.statements.append(sql)
+
+    def execution_options(self, **options):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeEngine:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def connect(self):
+        return self.conn
+
+
+def test_only_missing_months_are_created():
+    conn = FakeConnection(["tool_calls_202610", "tool_calls_default"])
+
+    created = ensure_partitions(conn, ahead=2, today=date(2026, 10, 17))
+
+    assert created == ["tool_calls_202611", "tool_calls_202612"]
+    assert "FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')" in conn.statements[-1]
+
+
+def test_expired_months_are_detached_then_dropped(monkeypatch):
+    conn = FakeConnection(["tool_calls_200001", "tool_calls_209901"])
+    monkeypatch.setattr(partitions, "engine", FakeEngine(conn))
+
+    assert expire_partitions(12) == ["tool_calls_200001"]
+    assert conn.statements == [
+        'ALTER TABLE tool_calls DETACH PARTITION "tool_calls_200001" CONCURRENTLY',
+        'DROP TABLE "tool_calls_200001"',
+    ]
+
+
+def test_default_partition_forces_a_plain_detach_and_detach_only_keeps_the_table(monkeypatch):
+    conn = FakeConnection(["tool_calls_200001", "tool_calls_default"])
+    monkeypatch.setattr(partitions, "engine", FakeEngine(conn))
+
+    expire_partitions(12, drop=False)
+
+    assert conn.statements == ['ALTER TABLE tool_calls DETACH PARTITION "tool_calls_200001"']
@@ -0,0 +1,49 @@
+import asyncio
+import uuid
+
+from app.schemas.webhooks import WebhookEvent
+from app.services.sequencing import CallSequencer, CallState
+
+ORG = uuid.uuid4()
+OTHER_ORG = uuid.uuid4()
+
+
+def _event(event_id: str, call_id: str = "vapi-call-1") -> WebhookEvent:
+    return WebhookEvent(event="call.transcript", call_id=call_id, payload={"id": event_id, "text": "Hello"})
+
+
+def _sequencer(*orgs: uuid.UUID) -> CallSequencer:
+    seq = CallSequencer(max_size=100, ttl=60)
+    for org in orgs:
+        seq._calls.set((org, "vapi-call-1"), CallState())  # known call, no database load
+    return seq
+
+
+def _filter(seq: CallSequencer, org: uuid.UUID, *events: WebhookEvent) -> list[WebhookEvent]:
+    return asyncio.run(seq.filter(None, org, list(events)))  # pyright: ignore[reportArgumentType]
+
+
+def test_redelivery_during_open_transaction_is_dropped():
+    seq = _sequencer(ORG)
+    first = _filter(seq, ORG, _event("evt-1"))
+    assert len(first) == 1
+    # same delivery again before the first one committed
+    assert _filter(seq, ORG, _event("evt-1")) == []
+    assert seq.stats()["inflight_duplicates"] == 1
+
+    seq.record(ORG, uuid.uuid4(), first)
+    assert _filter(seq, ORG, _event("evt-1")) == []
+    assert seq.stats()["inflight_calls"] == 0
+
+
+def test_released_events_are_admitted_again():
+    seq = _sequencer(ORG)
+    first = _filter(seq, ORG, _event("evt-1"))
+    seq.release(ORG, first)
+    assert len(_filter(seq, ORG, _event("evt-1"))) == 1
+
+
+def test_same_vapi_call_id_in_other_organization_is_not_a_duplicate():
+    seq = _sequencer(ORG, OTHER_ORG)
+    seq.record(ORG, uuid.uuid4(), _filter(seq, ORG, _event("evt-1")))
+    assert len(_filter(seq, OTHER_ORG, _event("evt-1"))) == 1
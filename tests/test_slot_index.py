@@ -0,0 +1,58 @@
+from app.services.slot_index import SlotIndex, to_epoch
+
+WINDOW = to_epoch("2026-03-02T00:00:00Z"), to_epoch("2026-03-05T00:00:00Z")
+
+
+def test_sub_window_keeps_every_overlapping_day():
+    data = {
+        "2026-03-02": [{"start": "2026-03-02T09:00:00.000Z", "end": "2026-03-02T09:30:00.000Z"}],
+        "2026-03-03": [],
+        "2026-03-04": [{"start": "2026-03-04T09:00:00.000Z", "end": "2026-03-04T09:30:00.000Z"}],
+    }
+    index = SlotIndex(data, *WINDOW)
+
+    assert index.slots(*WINDOW) == data
+    assert index.slots(to_epoch("2026-03-02T10:00:00Z"), to_epoch("2026-03-03T23:00:00Z")) == {
+        "2026-03-02": [],
+        "2026-03-03": [],
+    }
+
+
+def test_malformed_slots_are_kept_or_counted():
+    data = {
+        "2026-03-02": [
+            {"start": "2026-03-02T09:00:00.000Z", "end": "2026-03-02T09:30:00.000Z"},
+            {"start": "", "end": "2026-03-02T10:00:00.000Z"},
+            {"start": None, "end": None},
+            42,
+            "2026-03-02T11:00:00.000Z",
+        ],
+        "2026-03-03": ["09:00", "09:30"],
+    }
+    index = SlotIndex(data, *WINDOW)
+
+    assert (len(index), index.skipped) == (5, 2)
+    assert index.slots(*WINDOW) == {
+        "2026-03-02": [
+            {"start": "2026-03-02T09:00:00.000Z", "end": "2026-03-02T09:30:00.000Z"},
+            {"start": "", "end": "2026-03-02T10:00:00.000Z"},
+            {"start": "2026-03-02T11:00:00.000Z", "end": None},
+        ],
+        "2026-03-03": [{"start": "09:00", "end": None}, {"start": "09:30", "end": None}],
+    }
+    # Sub-window: parseable starts are filtered, unparseable ones stay with their day
+    assert index.slots(to_epoch("2026-03-02T10:30:00Z"), to_epoch("2026-03-03T12:00:00Z")) == {
+        "2026-03-02": [
+            {"start": "", "end": "2026-03-02T10:00:00.000Z"},
+            {"start": "2026-03-02T11:00:00.000Z", "end": None},
+        ],
+        "2026-03-03": [{"start": "09:00", "end": None}, {"start": "09:30", "end": None}],
+    }
+
+
+def test_days_follow_the_requested_time_zone():
+    data = {"2026-03-02": [{"start": "2026-03-02T09:00:00.000-05:00", "end": None}], "2026-03-03": []}
+    index = SlotIndex(data, *WINDOW, time_zone="America/New_York")
+
+    # 2026-03-03T03:00Z is still 2 March in New York
+    assert index.slots(to_epoch("2026-03-03T03:00:00Z"), to_epoch("2026-03-03T04:00:00Z")) == {"2026-03-02": []}
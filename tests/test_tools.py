@@ -0,0 +1,71 @@
+import asyncio
+import json
+import uuid
+from typing import Any, Dict, List
+
+from app.deps import AgentSnapshot
+from app.routers import tools
+from app.schemas.tools import VapiToolCallsRequest
+
+AGENT = AgentSnapshot(id=uuid.uuid4(), organization_id=uuid.uuid4(), cal_com_api_key=None, cal_com_event_type_id=None)
+LEAD_ID = str(uuid.uuid4())
+
+
+def _tool_calls(*calls: tuple[str, Dict[str, Any]]) -> VapiToolCallsRequest:
+    return VapiToolCallsRequest.model_validate({
+        "message": {
+            "type": "tool-calls",
+            "call": {"id": f"call-{uuid.uuid4()}"},
+            "toolCallList": [
+                {"id": f"tc-{i}-{uuid.uuid4()}", "function": {"name": name, "arguments": args}}
+                for i, (name, args) in enumerate(calls)
+            ],
+        }
+    })
+
+
+def test_fit_check_is_saved_before_qualify_in_same_batch(monkeypatch):
+    events: List[str] = []
+
+    def fake(name: str):
+        async def handler(payload, agent, db):
+            events.append(f"{name}:start")
+            await asyncio.sleep(0.01)
+            events.append(f"{name}:end")
+            return {"tool": name}
+        return handler
+
+    for name, (model, _) in list(tools.TOOL_HANDLERS.items()):
+        monkeypatch.setitem(tools.TOOL_HANDLERS, name, (model, fake(name)))
+
+    body = _tool_calls(
+        ("qualifyAndTag", {"lead_id": LEAD_ID}),
+        ("saveFitCheck", {"lead_id": LEAD_ID, "weekly_enquiries": "10"}),
+        ("upsertLead", {"phone": "+447700900000"}),
+        ("logOutcome", {"lead_id": LEAD_ID, "outcome_tag": "#parked"}),
+    )
+    resp = asyncio.run(tools.vapi_tool_calls(body, AGENT))
+
+    assert events.index("saveFitCheck:start") > events.index("upsertLead:end")
+    assert events.index("qualifyAndTag:start") > events.index("saveFitCheck:end")
+    # results stay in request order
+    assert [r.toolCallId for r in resp.results] == [tc.id for tc in body.message.toolCallList]
+    assert json.loads(resp.results[0].result) == {"tool": "qualifyAndTag"}
+
+
+def test_non_object_arguments_fail_only_their_entry(monkeypatch):
+    async def handler(payload, agent, db):
+        return {"ok": True}
+
+    model, _ = tools.TOOL_HANDLERS["logOutcome"]
+    monkeypatch.setitem(tools.TOOL_HANDLERS, "logOutcome", (model, handler))
+
+    body = _tool_calls(
+        ("logOutcome", "[1, 2]"),
+        ("logOutcome", "42"),
+        ("logOutcome", {"outcome_tag": "#parked"}),
+    )
+    resp = asyncio.run(tools.vapi_tool_calls(body, AGENT))
+
+    assert [r.error for r in resp.results[:2]] == ["Invalid arguments: arguments must be a JSON object"] * 2
+    assert json.loads(resp.results[2].result) == {"ok": True}
@@ -0,0 +1,117 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+from app import models
+from app.config import get_settings
+from app.schemas.webhooks import WebhookEvent
+from app.services import webhooks
+from app.services.transcripts import LivePartials, append_segment, is_final, parse_event_timestamp
+
+ORG_A, ORG_B = uuid.uuid4(), uuid.uuid4()
+AGENTS = {"assistant-a": (ORG_A, uuid.uuid4()), "assistant-b": (ORG_B, uuid.uuid4())}
+
+
+def _partial(assistant_id: str, text: str) -> WebhookEvent:
+    return WebhookEvent(
+        event="call.transcript.partial",
+        call_id="vapi-call-1",
+        payload={"assistantId": assistant_id, "role": "user", "text": text},
+    )
+
+
+def test_partials_are_scoped_by_org_and_unknown_assistants_dropped(monkeypatch):
+    partials = LivePartials(max_size=10, ttl=60)
+
+    async def resolve(db, payload):
+        return AGENTS.get(payload["assistantId"])
+
+    monkeypatch.setattr(get_settings(), "TRANSCRIPT_PARTIALS_MODE", "buffer")
+    monkeypatch.setattr(webhooks, "live_partials", partials)
+    monkeypatch.setattr(webhooks, "resolve_agent", resolve)
+
+    async def run():
+        return [
+            await webhooks.buffer_partial(None, _partial("assistant-a", "hello from a")),
+            await webhooks.buffer_partial(None, _partial("assistant-b", "hello from b")),
+            await webhooks.buffer_partial(None, _partial("unknown", "injected")),
+        ]
+
+    assert asyncio.run(run()) == [True, True, False]
+    assert [lp.text for lp in partials.get(ORG_A, "vapi-call-1")] == ["hello from a"]
+    assert [lp.text for lp in partials.get(ORG_B, "vapi-call-1")] == ["hello from b"]
+    assert partials.stats()["size"] == 2
+
+
+class RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+
+
+def test_event_timestamps_accept_epoch_ms_seconds_and_iso():
+    expected = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+    assert parse_event_timestamp(expected.timestamp() * 1000) == expected
+    assert parse_event_timestamp(expected.timestamp()) == expected
+    assert parse_event_timestamp("2026-03-02T09:00:00Z") == expected
+    assert parse_event_timestamp("yesterday") is None
+    assert parse_event_timestamp(None) is None
+
+
+def test_partials_are_not_final():
+    assert not is_final("call.transcript.partial", {})
+    assert not is_final("transcript", {"transcriptType": "partial"})
+    assert is_final("transcript", {"transcriptType": "final"})
+    assert is_final("call.transcript", {})
+
+
+def test_segment_is_appended_as_one_insert():
+    db = RecordingSession()
+    call_id = uuid.uuid4()
+    payload = {"role": "user", "transcriptType": "partial", "timestamp": "2026-03-02T09:00:00Z"}
+
+    asyncio.run(append_segment(db, call_id, "transcript", payload, "hello"))
+
+    (stmt,) = db.statements
+    assert stmt.table.name == "transcript_segments"
+    assert stmt.compile().params == {
+        "call_id": call_id,
+        "role": "user",
+        "text": "hello",
+        "is_final": False,
+        "timestamp": datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc),
+    }
+
+
+def test_final_after_call_end_extends_the_materialized_transcript():
+    call = models.Call(id=uuid.uuid4(), transcript="hello", ended_at=datetime.now(timezone.utc))
+    evt = WebhookEvent(event="call.transcript.final", call_id="vapi-call-1", payload={"text": "goodbye"})
+
+    asyncio.run(webhooks.apply_event(RecordingSession(), call, evt))
+
+    assert call.transcript == "hello\ngoodbye"
+
+
+def test_latest_partial_per_role_until_final_or_call_end():
+    partials = LivePartials(max_size=10, ttl=60)
+    partials.update(ORG_A, "vapi-call-1", "user", "hel")
+    partials.update(ORG_A, "vapi-call-1", "user", "hello")
+    partials.update(ORG_A, "vapi-call-1", "assistant", "hi")
+    assert [(lp.role, lp.text) for lp in partials.get(ORG_A, "vapi-call-1")] == [("user", "hello"), ("assistant", "hi")]
+
+    partials.finalize(ORG_A, "vapi-call-1", "user")
+    assert [lp.role for lp in partials.get(ORG_A, "vapi-call-1")] == ["assistant"]
+    partials.forget(ORG_A, "vapi-call-1")
+    assert partials.get(ORG_A, "vapi-call-1") == []
+    assert {k: partials.stats()[k] for k in ("buffered", "superseded", "finalized")} == {
+        "buffered": 3,
+        "superseded": 1,
+        "finalized": 1,
+    }
+
+
+def test_partials_are_persisted_unless_buffering(monkeypatch):
+    monkeypatch.setattr(get_settings(), "TRANSCRIPT_PARTIALS_MODE", "persist")
+    assert asyncio.run(webhooks.buffer_partial(None, _partial("assistant-a", "hello"))) is False
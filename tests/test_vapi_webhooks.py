@@ -0,0 +1,73 @@
+import orjson
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.db import get_async_db
+from app.main import app
+from app.routers import vapi_webhooks
+
+
+def test_full_ingest_queue_answers_503_instead_of_processing_inline(monkeypatch):
+    monkeypatch.setattr(get_settings(), "WEBHOOK_INGEST_MODE", "queue")
+    monkeypatch.setattr(type(vapi_webhooks.webhook_ingest), "running", property(lambda self: True))
+    monkeypatch.setattr(vapi_webhooks.webhook_ingest, "enqueue", lambda evt: False)
+
+    async def inline(db, events):
+        raise AssertionError("event was processed inline")
+
+    monkeypatch.setattr(vapi_webhooks, "process_call_events", inline)
+    app.dependency_overrides[get_async_db] = lambda: None
+    try:
+        resp = TestClient(app).post(
+            "/api/webhooks/vapi/events",
+            content=orjson.dumps({"event": "call.started", "call_id": "vapi-call-1", "payload": {}}),
+        )
+    finally:
+        app.dependency_overrides.pop(get_async_db, None)
+    assert resp.status_code == 503
+
+
+def test_bulk_positions_and_transactions_count_committed_calls(monkeypatch):
+    from app.deps import require_vapi_key
+    from app.services import webhooks
+
+    class Session:
+        async def __aenter__(self):
+            return None
+
+        async def __aexit__(self, *exc):
+            return False
+
+    async def process(db, events):
+        if events[0].call_id == "vapi-call-bad":
+            raise RuntimeError("rolled back")
+        return len(events)
+
+    monkeypatch.setattr(webhooks, "AsyncSessionLocal", Session)
+    monkeypatch.setattr(webhooks, "process_call_events", process)
+    body = [{"call_id": "no-event"}] + [
+        {"event": "call.started", "call_id": call_id, "payload": {}} for call_id in ("vapi-call-ok", "vapi-call-bad")
+    ]
+    for content, content_type in (
+        (orjson.dumps(body), "application/json"),
+        (b"\n".join(orjson.dumps(item) for item in body), "application/x-ndjson"),
+    ):
+        app.dependency_overrides[require_vapi_key] = lambda: None
+        try:
+            resp = TestClient(app).post(
+                "/api/webhooks/vapi/events/bulk", content=content, headers={"Content-Type": content_type}
+            )
+        finally:
+            app.dependency_overrides.pop(require_vapi_key, None)
+        result = resp.json()
+        assert result["errors"][0].startswith("item 1:")
+        assert (result["processed"], result["failed"], result["transactions"]) == (1, 1, 1)
+
+
+def test_bulk_errors_are_capped():
+    from app.schemas.webhooks import MAX_REPORTED_ERRORS, BulkIngestResult
+
+    result = BulkIngestResult()
+    for i in range(MAX_REPORTED_ERRORS + 5):
+        result.add_error(f"call {i}: RuntimeError")
+    assert len(result.errors) == MAX_REPORTED_ERRORS
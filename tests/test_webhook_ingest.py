@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from app.schemas.webhooks import WebhookEvent
+from app.services import webhook_ingest as ingest_module
+from app.services.webhook_ingest import WebhookIngestQueue
+
+
+def _event(call_id: str = "vapi-call-1", event: str = "call.started") -> WebhookEvent:
+    return WebhookEvent(event=event, call_id=call_id, payload={})
+
+
+class Session:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def applied(monkeypatch):
+    """Events handed to process_call_events, one list per transaction."""
+    transactions = []
+
+    async def process(db, events):
+        if any(evt.event == "boom" for evt in events):
+            raise RuntimeError("bad event")
+        transactions.append([(evt.call_id, evt.event) for evt in events])
+        return len(events)
+
+    monkeypatch.setattr(ingest_module, "AsyncSessionLocal", Session)
+    monkeypatch.setattr(ingest_module, "process_call_events", process)
+    return transactions
+
+
+def test_stop_drains_each_call_in_order_one_transaction_per_call(applied):
+    async def run():
+        queue = WebhookIngestQueue(workers=2, max_queue=100, batch_size=100)
+        queue.start()
+        for i in range(3):
+            for call_id in ("vapi-call-a", "vapi-call-b"):
+                assert queue.enqueue(_event(call_id, f"event-{i}"))
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(run())
+    by_call = {}
+    for transaction in applied:
+        assert len({call_id for call_id, _ in transaction}) == 1
+        by_call.setdefault(transaction[0][0], []).extend(event for _, event in transaction)
+    assert by_call == {call_id: ["event-0", "event-1", "event-2"] for call_id in ("vapi-call-a", "vapi-call-b")}
+    assert (queue.processed, queue.depth(), queue.running) == (6, 0, False)
+
+
+def test_failed_batch_is_retried_event_by_event(applied):
+    async def run():
+        queue = WebhookIngestQueue(workers=1, max_queue=10, batch_size=10)
+        queue.start()
+        for event in ("call.started", "boom", "call.ended"):
+            queue.enqueue(_event(event=event))
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(run())
+    assert applied == [[("vapi-call-1", "call.started")], [("vapi-call-1", "call.ended")]]
+    assert (queue.processed, queue.failed) == (2, 1)
+
+
+def test_worker_that_dies_is_restarted(applied):
+    async def run():
+        queue = WebhookIngestQueue(workers=1, max_queue=10, batch_size=10)
+        process_batch = queue._process
+
+        async def crash_once(batch):
+            queue._process = process_batch
+            raise RuntimeError("worker bug")
+
+        queue._process = crash_once
+        queue.start()
+        assert queue.enqueue(_event())
+        await asyncio.sleep(0.01)
+        assert queue.running and queue.restarts == 1
+        assert queue.enqueue(_event())
+        await queue.stop()
+
+    asyncio.run(run())
+    assert applied == [[("vapi-call-1", "call.started")]]
+
+
+def test_cancelled_worker_is_not_reported_running():
+    async def run():
+        queue = WebhookIngestQueue(workers=1, max_queue=10, batch_size=10)
+        queue.start()
+        queue._tasks[0].cancel()
+        await asyncio.sleep(0)
+        assert not queue.running
+        assert not queue.enqueue(_event())
+        await queue.stop()
+
+    asyncio.run(run())